@@ -0,0 +1,491 @@
+# bench.py
+# Benchmarks del Analyzer y de la UI sobre el roster real y rosters sintéticos (50/200/1000
+# héroes). Los resultados se guardan en JSON para comparar entre commits.
+# Uso: python bench.py [--sizes 50,200,1000] [--runs 10] [--out FICHERO] [--compare FICHERO] [--no-ui]
+# Sin pantalla las pruebas de la App se omiten; con Xvfb: xvfb-run python bench.py
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+
+from PIL import Image
+
+import datapack
+import rules
+from icons import ATLAS_SIZES, IconAtlas, IconLoader, PhotoCache, build_atlases, resolve_icon_path
+from draft import DraftEngine
+from main import Analyzer, App, HeroProfile, IMG_DIR, LineupState, ROLES, SLOT_ROLES, exit_on_load_errors
+
+RESULTS_DIR = "bench_results"
+DEFAULT_SIZES = (50, 200, 1000)
+LINEUPS = 200  # alineaciones aleatorias por ronda
+REGRESSION_THRESHOLD = 1.10  # --compare marca lo que sea >10 % más lento
+STARTUP_BUDGET_MS = 1000  # mediana máxima de time-to-interactive (--startup-budget)
+
+
+def _stats(times_ms):
+    times_ms = sorted(times_ms)
+    return {"runs": len(times_ms), "best_ms": times_ms[0], "median_ms": times_ms[len(times_ms) // 2],
+            "worst_ms": times_ms[-1]}
+
+
+def _timeit(func, runs, setup=None):
+    times = []
+    for _ in range(runs):
+        if setup: setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return _stats(times)
+
+
+# --- ROSTERS SINTÉTICOS ---
+def make_synthetic_roster(heroes, size, seed=0):
+    # Los héroes reales se conservan tal cual; el resto son copias (mismo rol y perfil)
+    # con counters/sinergias reasignados al azar dentro del roster ampliado
+    rnd = random.Random(seed)
+    base = list(heroes)
+    names = base[:size] + [f"{base[i % len(base)]} #{i // len(base) + 1}" for i in range(len(base), size)]
+    roster = {}
+    for i, name in enumerate(names):
+        template = base[i % len(base)]
+        hero = copy.deepcopy(heroes[template])
+        if i >= len(base):
+            for field in datapack.MATCHUP_FIELDS:
+                entries = list(hero.get(field, {}).values())
+                others = rnd.sample([n for n in names if n != name], min(len(entries), size - 1))
+                hero[field] = dict(zip(others, entries))
+        elif size < len(base):
+            for field in datapack.MATCHUP_FIELDS:
+                hero[field] = {o: e for o, e in hero.get(field, {}).items() if o in names}
+        roster[name] = hero
+    return roster
+
+
+def write_roster(roster, directory, seed=0):
+    rnd = random.Random(seed)
+    data_path = os.path.join(directory, "data.json")
+    bans_path = os.path.join(directory, "bans.json")
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump({"heroes": roster}, f, ensure_ascii=False)
+    with open(bans_path, 'w', encoding='utf-8') as f:
+        json.dump({"popularity": {name: rnd.randint(0, 100) for name in roster}}, f)
+    return data_path, bans_path
+
+
+def random_lineups(analyzer, count, seed=0):
+    # Alineaciones 1-2-2 completas para ambos equipos, sin héroes repetidos
+    rnd = random.Random(seed)
+    by_role = {r: [h for h in analyzer.hero_names if analyzer.data[h]['role'] == r] for r in ROLES}
+    lineups = []
+    for _ in range(count):
+        picks = {r: rnd.sample(by_role[r], SLOT_ROLES.count(r) * 2) for r in ROLES}
+        allies = [picks[r].pop() for r in SLOT_ROLES]
+        lineups.append((allies, [picks[r].pop() for r in SLOT_ROLES]))
+    return lineups
+
+
+# --- ANALYZER ---
+def _clear_caches(analyzer):
+    # Las mediciones "en frío" empiezan siempre con las LRU del Analyzer vacías
+    for cache in analyzer.lru_caches.values(): cache.clear()
+
+
+def bench_load_data(data_path, bans_path, runs=10):
+    # Sólo data.json (el pack compilado se mide aparte en bench_data_formats)
+    analyzer = Analyzer(data_path, bans_path, pack_path=data_path + ".missing", autoload=False)
+    return {"load_data": _timeit(analyzer.load_data, runs)}
+
+
+def bench_calculate_score(analyzer, lineups, runs=10):
+    def score_all():
+        for allies, enemies in lineups:
+            for hero in allies: analyzer.calculate_score(hero, allies, enemies)
+            for hero in enemies: analyzer.calculate_score(hero, enemies, allies)
+    return {f"{len(lineups) * 10} calls": _timeit(score_all, runs)}
+
+
+def bench_recommendations(analyzer, lineups, runs=10, seed=0):
+    rnd = random.Random(seed)
+    forced = [rnd.randrange(len(SLOT_ROLES)) for _ in lineups]
+    bans = [rnd.sample(analyzer.hero_names, 4) for _ in lineups]
+
+    def weakest():
+        for (allies, enemies), b in zip(lineups, bans):
+            analyzer.get_recommendations(allies, enemies, b)
+
+    def forced_slot():
+        for (allies, enemies), b, idx in zip(lineups, bans, forced):
+            analyzer.get_recommendations(allies, enemies, b, idx)
+
+    def swap_gains():
+        for (allies, enemies), b in zip(lineups, bans):
+            analyzer.get_swap_gains(allies, enemies, b, k=5)
+
+    clear = lambda: _clear_caches(analyzer)
+    return {"weakest": _timeit(weakest, runs, setup=clear), "forced_idx": _timeit(forced_slot, runs, setup=clear),
+            "cached": _timeit(forced_slot, runs), "swap_gains": _timeit(swap_gains, runs, setup=clear)}
+
+
+def bench_expected_score(analyzer, lineups, runs=10, seed=0):
+    # Modo esperado con 0-5 huecos enemigos vacíos: scores de los aliados + recomendación, sin caché
+    rnd = random.Random(seed)
+    bans = [rnd.sample(analyzer.hero_names, 4) for _ in lineups]
+    results = {}
+    for unknown in range(len(SLOT_ROLES) + 1):
+        partial = []
+        for allies, enemies in lineups:
+            hidden = set(rnd.sample(range(len(SLOT_ROLES)), unknown))
+            partial.append((allies, [e if i not in hidden else "" for i, e in enumerate(enemies)]))
+
+        def expected_all():
+            for (allies, enemies), b in zip(partial, bans):
+                for hero in allies: analyzer.calculate_score(hero, allies, enemies, b, expected=True)
+                analyzer.get_recommendations(allies, enemies, b, expected=True)
+        results[f"{unknown} unknown"] = _timeit(expected_all, runs, setup=lambda: _clear_caches(analyzer))
+    return results
+
+
+def bench_rules(analyzer, runs=10, samples=2000):
+    # rules.json interpretado en cada llamada frente a las funciones generadas; y coste de generarlas
+    queries = rules.random_queries(analyzer, samples)
+    interpreted = lambda: [rules.interpreted_score(analyzer.rules, analyzer, analyzer.profiles[h], a, e)
+                           for h, a, e in queries]
+    compiled = lambda: [analyzer.score_ids(h, a, e) for h, a, e in queries]
+    return {"interpreted": _timeit(interpreted, runs), "compiled": _timeit(compiled, runs),
+            "build_cold": _timeit(lambda: rules.build_scorers(analyzer), runs, setup=rules._compiled.clear),
+            "build_cached": _timeit(lambda: rules.build_scorers(analyzer), runs)}
+
+
+def bench_reports(analyzer, lineups, runs=10):
+    def arguments():
+        for allies, enemies in lineups:
+            analyzer.generate_argument(allies[0], enemies, allies, 'en')
+
+    def analysis():
+        for allies, enemies in lineups:
+            analyzer.get_hero_analysis(allies[0], allies, enemies, 'en')
+
+    return {"argument": _timeit(arguments, runs), "analysis": _timeit(analysis, runs)}
+
+
+def bench_optimize_composition(analyzer, runs=20, seed=0):
+    rnd = random.Random(seed)
+    by_role = {r: [h for h in analyzer.hero_names if analyzer.data[h]['role'] == r] for r in ROLES}
+    queries = []
+    for _ in range(runs):
+        enemies = [rnd.choice(by_role["Tank"])] + rnd.sample(by_role["Damage"], 2) + rnd.sample(by_role["Support"], 2)
+        bans = rnd.sample(analyzer.hero_names, 4)
+        queries.append((enemies, bans))
+
+    it = iter(queries)
+    # Sin caché: cada consulta es distinta
+    cold = _timeit(lambda: analyzer.optimize_composition(*next(it), k=3), runs)
+    warm = _timeit(lambda: analyzer.optimize_composition(*queries[0], k=3), runs)
+    return {"cold": cold, "cached": warm}
+
+
+def bench_draft(analyzer, runs=5, depth=3, budget_ms=300):
+    # Motor de draft: búsqueda a profundidad fija (tiempo) y con presupuesto de tiempo (nodos/s)
+    states = {"ban_phase": ([], [], []),
+              "pick_phase": ([], [], analyzer.get_sorted_heroes_for_bans()[:4]),
+              "late_picks": (analyzer.hero_names[:3], analyzer.hero_names[-2:], [])}
+    results = {}
+    for label, (allies, enemies, bans) in states.items():
+        fixed = _timeit(lambda: DraftEngine(analyzer).search(allies, enemies, bans, budget_ms=60000, max_depth=depth), runs)
+        timed = DraftEngine(analyzer).search(allies, enemies, bans, budget_ms=budget_ms)
+        results[label] = dict(fixed, depth=timed["depth"], nodes=timed["nodes"], nodes_per_s=round(timed["nps"]))
+    return results
+
+
+def bench_icon_startup(analyzer, runs=5):
+    # Arranque en frío: todos los iconos a 40 px (rejilla) y 80 px (primer spotlight)
+    heroes = analyzer.hero_names
+    atlas_dir = tempfile.mkdtemp(prefix="atlas_")
+    try:
+        build_atlases(heroes, IMG_DIR, atlas_dir, ATLAS_SIZES)
+
+        def per_file():
+            for size in (40, 80):
+                for h in heroes:
+                    path = resolve_icon_path(h, IMG_DIR)
+                    if path: Image.open(path).resize((size, size), Image.Resampling.LANCZOS)
+
+        def from_atlas():
+            atlas = IconAtlas(heroes, IMG_DIR, atlas_dir)
+            atlas.load()
+            for size in (40, 80):
+                for h in heroes: atlas.get(h, size)
+
+        return {"png+lanczos": _timeit(per_file, runs), "atlas": _timeit(from_atlas, runs)}
+    finally:
+        shutil.rmtree(atlas_dir, ignore_errors=True)
+
+
+def bench_data_formats(runs=50):
+    # Arranque de datos: data.json completo frente al pack compilado (sin textos)
+    tmp_dir = tempfile.mkdtemp(prefix="pack_")
+    try:
+        pack_path = os.path.join(tmp_dir, "data.bin")
+        datapack.write_pack('data.json', pack_path)
+        missing = os.path.join(tmp_dir, "missing.bin")
+        return {"json": _timeit(lambda: Analyzer('data.json', 'bans.json', pack_path=missing), runs),
+                "pack": _timeit(lambda: Analyzer('data.json', 'bans.json', pack_path=pack_path), runs),
+                "pack+text": _timeit(lambda: Analyzer('data.json', 'bans.json', pack_path=pack_path).get_tip('Ana'), runs)}
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _traced_kb(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return round(size / 1024, 1)
+
+
+def bench_hero_model(analyzer, runs=20, repeat=200):
+    # Modelo dict (data.json sin matchups) frente a HeroProfile: memoria y lectura de los
+    # atributos que usan recomendaciones, argumentos y análisis
+    names = analyzer.hero_names
+    heroes = {n: {k: v for k, v in analyzer.data[n].items() if k not in datapack.MATCHUP_FIELDS} for n in names}
+
+    def dict_access():
+        for _ in range(repeat):
+            for info in heroes.values():
+                (info.get('role'), info.get('sub_role', 'General'), info.get('damage_profile', {}).get('poke', 1),
+                 info.get('weakness_profile', {}).get('cc_susceptibility', 0), info.get('team_dependency', 3))
+
+    def profile_access():
+        for _ in range(repeat):
+            for p in analyzer.profiles:
+                (p.role, p.sub_role, p.poke, p.cc_susceptibility, p.team_dependency)
+
+    sub_ids = analyzer.sub_role_vec
+    memory = {"dict_kb": _traced_kb(lambda: copy.deepcopy(heroes)),
+              "profile_kb": _traced_kb(lambda: [HeroProfile(i, n, heroes[n], sub_ids[i]) for i, n in enumerate(names)])}
+    return {"dict": _timeit(dict_access, runs), "profile": _timeit(profile_access, runs), "memory": memory}
+
+
+# --- UI (raíz de Tk oculta) ---
+def _headless_app():
+    # Devuelve (root, app) o el motivo por el que no se puede crear una ventana
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return None, f"no display ({e})"
+    root.withdraw()
+    return root, App(root)
+
+
+def _close_app(root, app):
+    if app._refresh_job is not None: root.after_cancel(app._refresh_job)
+    app.on_close()
+
+
+def bench_update_live_stats(analyzer, lineups, runs=10):
+    root, app = _headless_app()
+    if root is None: return {"skipped": app}
+    try:
+        app.analyzer = analyzer
+        app.lineup = LineupState(analyzer)
+
+        def fill(allies, enemies):
+            app._refreshing = True  # las escrituras no programan refrescos extra
+            for var, name in zip(app.ally_vars, allies): var.set(name)
+            for var, name in zip(app.enemy_vars, enemies): var.set(name)
+            app._refreshing = False
+
+        # Un hueco distinto por llamada (caso típico) y la alineación entera de golpe
+        def one_slot():
+            for n, (allies, enemies) in enumerate(lineups):
+                app.enemy_vars[n % len(SLOT_ROLES)].set(enemies[n % len(SLOT_ROLES)])
+                app.update_live_stats()
+
+        def full_lineup():
+            for allies, enemies in lineups:
+                fill(allies, enemies)
+                app.update_live_stats()
+
+        return {"one slot": _timeit(one_slot, runs, setup=lambda: fill(*lineups[0])),
+                "full lineup": _timeit(full_lineup, runs)}
+    finally:
+        _close_app(root, app)
+
+
+def bench_startup(runs=5):
+    # Arranque real en un proceso nuevo (main.py --startup-report): hitos en ms desde el primer import
+    marks = {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "main.py", "--startup-report"], capture_output=True, text=True,
+                              timeout=60)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            reason = (proc.stderr.strip().splitlines() or ["sin salida"])[-1]
+            return {"skipped": reason}
+        for phase, ms in json.loads(lines[-1]).items():
+            marks.setdefault(phase, []).append(ms)
+    return {phase: _stats(times) for phase, times in marks.items()}
+
+
+def bench_load_hero_icon(runs=5):
+    # Todos los iconos de img/ con las cachés vacías (rejilla 40 px y spotlight 80 px)
+    root, app = _headless_app()
+    if root is None: return {"skipped": app}
+    try:
+        heroes = [h for h in app.analyzer.hero_names if resolve_icon_path(h, IMG_DIR)]
+        if not app.icon_atlas.load(): app.icon_atlas.build()
+
+        def cold():
+            app.icon_loader.shutdown()
+            app.image_cache = PhotoCache()
+            app.icon_loader = IconLoader(app.icon_atlas, IMG_DIR)
+
+        result = {}
+        for size in ((40, 40), (80, 80)):
+            result[f"{size[0]}px"] = _timeit(lambda: [app.load_hero_icon(h, size) for h in heroes], runs, setup=cold)
+        return result
+    finally:
+        _close_app(root, app)
+
+
+# --- EJECUCIÓN Y COMPARACIÓN ---
+def run_roster(heroes, size, runs, ui=True):
+    tmp_dir = tempfile.mkdtemp(prefix=f"roster{size}_")
+    try:
+        data_path, bans_path = write_roster(make_synthetic_roster(heroes, size), tmp_dir)
+        analyzer = Analyzer(data_path, bans_path)
+        lineups = random_lineups(analyzer, LINEUPS)
+        results = {
+            "load_data": bench_load_data(data_path, bans_path, runs),
+            "calculate_score": bench_calculate_score(analyzer, lineups, runs),
+            "get_recommendations": bench_recommendations(analyzer, lineups, runs),
+            "expected_score": bench_expected_score(analyzer, lineups, runs),
+            "rules": bench_rules(analyzer, runs),
+            "reports": bench_reports(analyzer, lineups, runs),
+        }
+        if ui: results["update_live_stats"] = bench_update_live_stats(analyzer, lineups, runs)
+        return results
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(sizes=DEFAULT_SIZES, runs=10, ui=True, progress=print):
+    analyzer = Analyzer('data.json', 'bans.json')
+    exit_on_load_errors(analyzer)
+    suite = {"meta": {"commit": _commit(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                      "python": platform.python_version(), "platform": platform.platform(),
+                      "sizes": list(sizes), "runs": runs, "lineups": LINEUPS},
+             "results": {}}
+    results = suite["results"]
+
+    progress(f"Roster real: {len(analyzer.hero_names)} heroes")
+    results["real"] = {"optimize_composition": bench_optimize_composition(analyzer),
+                       "draft": bench_draft(analyzer),
+                       "icon_startup": bench_icon_startup(analyzer),
+                       "data_formats": bench_data_formats(),
+                       "hero_model": bench_hero_model(analyzer)}
+    if ui:
+        results["real"]["startup"] = bench_startup()
+        results["real"]["load_hero_icon"] = bench_load_hero_icon()
+    for size in sizes:
+        progress(f"Roster sintético: {size} heroes")
+        results[f"roster_{size}"] = run_roster(analyzer.data, size, runs, ui)
+    return suite
+
+
+def compare(old, new):
+    # Lista de (grupo, benchmark, caso, mediana anterior, mediana actual)
+    rows = []
+    for group, benches in new["results"].items():
+        for bench, cases in benches.items():
+            for case, stats in cases.items():
+                before = old.get("results", {}).get(group, {}).get(bench, {}).get(case)
+                if isinstance(stats, dict) and isinstance(before, dict) and "median_ms" in before:
+                    rows.append((group, bench, case, before["median_ms"], stats["median_ms"]))
+    return rows
+
+
+def print_result(name, result):
+    print(f"{name}:")
+    for label, stats in result.items():
+        if label == "skipped":
+            print(f"  omitido: {stats}")
+            continue
+        if "best_ms" not in stats:
+            print(f"  {label:<12} " + " | ".join(f"{k} {v}" for k, v in stats.items()))
+            continue
+        extra = " | ".join(f"{k} {v}" for k, v in stats.items() if k not in ("runs", "best_ms", "median_ms", "worst_ms"))
+        print(f"  {label:<12} best {stats['best_ms']:.2f} ms | median {stats['median_ms']:.2f} ms | "
+              f"worst {stats['worst_ms']:.2f} ms ({stats['runs']} runs)" + (f" | {extra}" if extra else ""))
+
+
+def print_comparison(rows, old_commit):
+    print(f"\nComparación con {old_commit} (mediana):")
+    for group, bench, case, before, after in rows:
+        ratio = after / before if before else float('inf')
+        flag = "  <-- más lento" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"  {group:<12} {bench:<20} {case:<12} {before:9.2f} -> {after:9.2f} ms  x{ratio:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de Overwatcher")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="tamaños de roster sintético separados por comas")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--out", default=None, help=f"por defecto {RESULTS_DIR}/<commit>.json")
+    parser.add_argument("--compare", default=None, help="JSON de una ejecución anterior")
+    parser.add_argument("--no-ui", action="store_true", help="omite las pruebas que necesitan Tk")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS,
+                        help="falla (código 1) si la mediana de time-to-interactive lo supera (ms)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    suite = run_suite(sizes, args.runs, ui=not args.no_ui)
+    for group, benches in suite["results"].items():
+        print(f"\n== {group} ==")
+        for name, result in benches.items():
+            print_result(name, result)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{suite['meta']['commit']}.json")
+    if os.path.dirname(out): os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(suite, f, indent=2)
+    print(f"\nResultados -> {out}")
+
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                old = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: no se pudo leer {args.compare}: {e}")
+            sys.exit(1)
+        print_comparison(compare(old, suite), old.get("meta", {}).get("commit", args.compare))
+
+    interactive = suite["results"]["real"].get("startup", {}).get("interactive")
+    if interactive and interactive["median_ms"] > args.startup_budget:
+        print(f"\nError: time-to-interactive {interactive['median_ms']:.0f} ms > presupuesto {args.startup_budget:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
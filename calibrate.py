@@ -0,0 +1,295 @@
+# calibrate.py
+# Calibración de los pesos de rules.json con resultados de partidas reales.
+# Cada partida se convierte en un vector de términos de puntuación (aliados - enemigos): matchups,
+# sinergias y cuántas veces se dispara cada regla de bonus. Con los pesos actuales, pesos·términos
+# es la diferencia de puntuación de calculate_score; aquí se ajustan por regresión logística
+# con minibatches sobre un fichero binario de términos, así la memoria depende del tamaño del lote.
+# Entrada (JSONL, ".gz" admitido), una partida por línea:
+#   {"allies": ["Ana", ...], "enemies": [...], "winner": "allies" | "enemies" | "draw"}
+# Uso: python calibrate.py matches.jsonl [--rules rules.json] [--out rules.json] [--dry-run]
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+from itertools import repeat
+from operator import add, mul
+
+import rules
+from main import Analyzer, exit_on_load_errors
+
+BATCH_SIZE = 4096
+EPOCHS = 8
+LEARNING_RATE = 0.2
+VALIDATION_EVERY = 10  # 1 de cada N partidas se reserva para validar
+PROGRESS_EVERY = 100000
+MAX_LOGIT = 35.0  # exp() no desborda y la pérdida sigue siendo finita
+LABELS = {"allies": 1.0, "enemies": 0.0, "draw": 0.5}
+ROW = array('d').itemsize
+
+
+class CalibrationStats:
+    def __init__(self):
+        self.matches = 0
+        self.train = 0
+        self.validation = 0
+        self.errors = 0
+        self.unknown = 0
+        self.start = time.perf_counter()
+
+    def matches_per_second(self):
+        return self.matches / max(time.perf_counter() - self.start, 1e-9)
+
+
+def read_matches(path, stats):
+    # Generador de partidas; las líneas mal formadas se cuentan y se saltan
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): continue
+            try:
+                match = json.loads(line)
+                if not isinstance(match, dict) or match.get("winner") not in LABELS: raise ValueError("sin resultado")
+            except ValueError:
+                stats.errors += 1
+                continue
+            yield match
+
+
+class Featurizer:
+    # Términos de puntuación de una partida. Las matrices se toman del Analyzer con escalas 1,
+    # y las reglas se resuelven por héroe una sola vez (qué regla de cada grupo le aplica)
+    def __init__(self, analyzer):
+        self.an = analyzer
+        self.rules = analyzer.rules
+        analyzer.rules = dict(analyzer.rules, matchup_scale=1.0, synergy_scale=1.0)
+        analyzer.compile_data()
+        self.names = ["matchup_scale", "synergy_scale"]
+        self.current = [self.rules['matchup_scale'], self.rules.get('synergy_scale', 1.0)]
+        self.terms = {field: [() for _ in analyzer.profiles] for field in rules.BONUS_FIELDS}
+        for field in rules.BONUS_FIELDS:
+            group = self.rules.get(field, {})
+            for i, rule in enumerate(group.get('rules', ())):
+                index = len(self.names)
+                self.names.append(f"{field}[{i}]")
+                self.current.append(rule['bonus'])
+                for p in analyzer.profiles:
+                    if not rules.matches(rule.get('if', {}), p): continue
+                    # En modo 'first' sólo cuenta la primera regla que se cumple
+                    if group.get('mode') == 'first' and self.terms[field][p.id]: continue
+                    self.terms[field][p.id] += (index,)
+
+    def team_terms(self, x, sign, team, opponents):
+        an = self.an
+        enemy_poke, enemy_flankers = an.get_comp_stats_ids(opponents)
+        poke = enemy_poke >= an.poke_threshold
+        flank = enemy_flankers >= an.flank_threshold
+        for h in team:
+            allies = [a for a in team if a != h]
+            x[0] += sign * sum(map(an.matchup[h].__getitem__, opponents))
+            x[1] += sign * sum(map(an.synergy[h].__getitem__, allies))
+            fired = self.terms['base_bonus'][h]
+            if poke: fired += self.terms['poke_bonus'][h]
+            if flank: fired += self.terms['flank_bonus'][h]
+            if an.synergy_sets[h].isdisjoint(allies): fired += self.terms['lonely_penalty'][h]
+            for index in fired: x[index] += sign
+
+    def features(self, ally_ids, enemy_ids):
+        x = [0.0] * len(self.names)
+        self.team_terms(x, 1, ally_ids, enemy_ids)
+        self.team_terms(x, -1, enemy_ids, ally_ids)
+        return x
+
+
+def extract(featurizer, matches, train_file, validation_file, stats):
+    # Escribe filas (términos..., etiqueta) en disco; devuelve la media de cuadrados de cada término (train)
+    to_ids = featurizer.an.hero_ids
+    dim = len(featurizer.names)
+    squares = [0.0] * dim
+    buffers = {train_file: array('d'), validation_file: array('d')}
+    for match in matches:
+        stats.matches += 1
+        try:
+            ally_ids = [to_ids[h] for h in match.get("allies", ()) if h]
+            enemy_ids = [to_ids[h] for h in match.get("enemies", ()) if h]
+        except (KeyError, TypeError):
+            stats.unknown += 1
+            continue
+        x = featurizer.features(ally_ids, enemy_ids)
+        if stats.matches % VALIDATION_EVERY == 0:
+            target = validation_file
+            stats.validation += 1
+        else:
+            target = train_file
+            stats.train += 1
+            squares = list(map(add, squares, map(mul, x, x)))
+        buffer = buffers[target]
+        buffer.extend(x)
+        buffer.append(LABELS[match["winner"]])
+        if len(buffer) >= BATCH_SIZE * (dim + 1):
+            buffer.tofile(target)
+            del buffer[:]
+        if stats.matches % PROGRESS_EVERY == 0:
+            print(f"\r{stats.matches} partidas | {stats.matches_per_second():.0f} partidas/s",
+                  end="", file=sys.stderr, flush=True)
+    for target, buffer in buffers.items(): buffer.tofile(target)
+    return [s / max(stats.train, 1) for s in squares]
+
+
+def read_batch(f, dim, batch_size):
+    # (columnas, etiquetas) de hasta batch_size filas desde la posición actual del fichero
+    data = array('d')
+    try:
+        data.fromfile(f, batch_size * (dim + 1))
+    except EOFError:
+        pass  # último lote incompleto: fromfile ya ha leído lo que había
+    stride = dim + 1
+    return [data[i::stride] for i in range(dim)], data[dim::stride]
+
+
+def batches(f, dim, rows, batch_size, rnd=None):
+    # Lotes de tamaño fijo; con rnd se recorren en orden aleatorio saltando con seek
+    offsets = list(range(0, rows, batch_size))
+    if rnd: rnd.shuffle(offsets)
+    for offset in offsets:
+        f.seek(offset * (dim + 1) * ROW)
+        yield read_batch(f, dim, batch_size)
+
+
+def logits(weights, columns, size):
+    z = [0.0] * size
+    for w, column in zip(weights, columns):
+        if w: z = list(map(add, z, map(mul, column, repeat(w))))
+    return [max(-MAX_LOGIT, min(MAX_LOGIT, v)) for v in z]
+
+
+def batch_loss(z, labels):
+    # Pérdida logística sumada (estable: log(1 + e^z) - y·z)
+    return sum(math.log1p(math.exp(-abs(v))) + max(v, 0.0) - y * v for v, y in zip(z, labels))
+
+
+def fit(f, dim, rows, scales, epochs=EPOCHS, batch_size=BATCH_SIZE, learning_rate=LEARNING_RATE, seed=0):
+    # Adam sobre términos normalizados (x / escala): pesos reales = theta / escala
+    rnd = random.Random(seed)
+    theta, m, v = [0.0] * dim, [0.0] * dim, [0.0] * dim
+    beta1, beta2, eps, step = 0.9, 0.999, 1e-8, 0
+    for epoch in range(epochs):
+        total = 0.0
+        for columns, labels in batches(f, dim, rows, batch_size, rnd):
+            size = len(labels)
+            weights = [t / s for t, s in zip(theta, scales)]
+            z = logits(weights, columns, size)
+            total += batch_loss(z, labels)
+            errors = [1.0 / (1.0 + math.exp(-v)) - y for v, y in zip(z, labels)]
+            step += 1
+            for i, column in enumerate(columns):
+                g = sum(map(mul, errors, column)) / (size * scales[i])
+                m[i] = beta1 * m[i] + (1 - beta1) * g
+                v[i] = beta2 * v[i] + (1 - beta2) * g * g
+                theta[i] -= learning_rate * (m[i] / (1 - beta1 ** step)) / (math.sqrt(v[i] / (1 - beta2 ** step)) + eps)
+        print(f"época {epoch + 1}/{epochs}: pérdida {total / max(rows, 1):.4f}", file=sys.stderr)
+    return [t / s for t, s in zip(theta, scales)]
+
+
+def evaluate(f, dim, rows, weights, batch_size=BATCH_SIZE):
+    # (pérdida logística media, acierto) con los pesos dados; los empates no cuentan para el acierto
+    loss, hits, decided = 0.0, 0, 0
+    for columns, labels in batches(f, dim, rows, batch_size):
+        z = logits(weights, columns, len(labels))
+        loss += batch_loss(z, labels)
+        for v, y in zip(z, labels):
+            if y == 0.5: continue
+            decided += 1
+            hits += (v > 0) == (y == 1.0)
+    return loss / max(rows, 1), hits / max(decided, 1)
+
+
+def calibrated_rules(featurizer, weights, scales):
+    # Reglas con los pesos ajustados, reescalados para conservar matchup_scale (la escala de puntos
+    # que ve la interfaz). Los términos sin datos conservan su valor actual.
+    # Devuelve (reglas, puntos por unidad de log-odds) o (None, motivo)
+    anchor = featurizer.current[0] / weights[0] if weights[0] > 0 else None
+    if anchor is None or featurizer.current[0] <= 0:
+        return None, "el peso de matchup ajustado no es positivo; no se puede conservar la escala"
+    values = [round(w * anchor, 3) if s else c for w, s, c in zip(weights, scales, featurizer.current)]
+    calibrated = json.loads(json.dumps(featurizer.rules))
+    calibrated['matchup_scale'], calibrated['synergy_scale'] = values[0], values[1]
+    index = 2
+    for field in rules.BONUS_FIELDS:
+        for rule in calibrated.get(field, {}).get('rules', ()):
+            rule['bonus'] = values[index]
+            # validate() exige lonely_penalty <= 0 (la poda de optimize_composition lo supone)
+            if field == 'lonely_penalty' and rule['bonus'] > 0: rule['bonus'] = 0.0
+            index += 1
+    return calibrated, anchor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajusta los pesos de rules.json con resultados de partidas")
+    parser.add_argument("matches")
+    parser.add_argument("--rules", default=rules.RULES_PATH)
+    parser.add_argument("--out", default=None, help="por defecto, el mismo fichero de reglas")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--dry-run", action="store_true", help="muestra los pesos sin escribirlos")
+    args = parser.parse_args()
+
+    analyzer = Analyzer('data.json', 'bans.json', rules_path=args.rules)
+    exit_on_load_errors(analyzer)
+    featurizer = Featurizer(analyzer)
+    dim = len(featurizer.names)
+    stats = CalibrationStats()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        train_path, validation_path = os.path.join(workdir, "train.bin"), os.path.join(workdir, "validation.bin")
+        with open(train_path, 'wb') as train_file, open(validation_path, 'wb') as validation_file:
+            squares = extract(featurizer, read_matches(args.matches, stats), train_file, validation_file, stats)
+        print(f"\n{stats.matches} partidas en {time.perf_counter() - stats.start:.1f} s "
+              f"({stats.matches_per_second():.0f} partidas/s) | {stats.errors} errores | "
+              f"{stats.unknown} con héroes desconocidos", file=sys.stderr)
+        if not stats.train:
+            print("Error: no hay partidas válidas para ajustar")
+            raise SystemExit(1)
+        scales = [math.sqrt(s) for s in squares]
+
+        with open(train_path, 'rb') as f:
+            weights = fit(f, dim, stats.train, [s or 1.0 for s in scales],
+                          args.epochs, args.batch_size, args.learning_rate)
+        with open(validation_path, 'rb') as f:
+            before = evaluate(f, dim, stats.validation, featurizer.current)
+            after = evaluate(f, dim, stats.validation, weights)
+
+    calibrated, anchor = calibrated_rules(featurizer, weights, scales)
+    print(f"validación ({stats.validation} partidas): acierto {before[1]:.1%} -> {after[1]:.1%} | "
+          f"pérdida {after[0]:.4f}")
+    if calibrated is None:
+        print(f"Error: {anchor}")
+        raise SystemExit(1)
+    print(f"1 unidad de log-odds = {anchor:.2f} puntos")
+    values = [calibrated['matchup_scale'], calibrated['synergy_scale']]
+    values += [rule['bonus'] for field in rules.BONUS_FIELDS for rule in calibrated.get(field, {}).get('rules', ())]
+    for name, old, new, scale in zip(featurizer.names, featurizer.current, values, scales):
+        print(f"  {name:<20} {old:>8} -> {new:>8}" + ("" if scale else "  (sin datos)"))
+
+    problems = rules.validate(calibrated)
+    if problems:
+        print("Error: " + "; ".join(problems))
+        raise SystemExit(1)
+    if args.dry_run: return
+    out = args.out or args.rules
+    # Escritura atómica: la app vigila el fichero de reglas y lo recarga al cambiar
+    with open(out + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(calibrated, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(out + ".tmp", out)
+    print(f"Pesos guardados en {out}")
+
+
+if __name__ == "__main__":
+    main()
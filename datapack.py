@@ -0,0 +1,123 @@
+# datapack.py
+# Formato compilado de data.json: cabecera + bloque numérico + bloque de textos.
+# Los datos numéricos se cargan al arrancar; los textos (tips es/en y tipos de
+# counter) sólo cuando se piden. Si el hash no coincide se vuelve a data.json.
+# Uso: python datapack.py [data.json] [data.bin]
+import argparse
+import hashlib
+import json
+import marshal
+import struct
+import sys
+
+PACK_MAGIC = b"OWDP"
+PACK_VERSION = 1
+# magic, versión del formato, versión de Python (marshal), sha256 del JSON, tamaños de bloque
+HEADER = struct.Struct("<4sHBB32sII")
+TEXT_FIELDS = ('es', 'en', 'tips')
+MATCHUP_FIELDS = ('counters', 'countered_by', 'synergies')
+
+
+def split_text(heroes):
+    # Separa los textos (sólo se usan en informes) de los datos numéricos
+    numeric, text = {}, {}
+    for name, info in heroes.items():
+        hero = {k: v for k, v in info.items() if k not in TEXT_FIELDS}
+        hero_text = {k: info[k] for k in TEXT_FIELDS if k in info}
+        for field in MATCHUP_FIELDS:
+            if field not in info: continue
+            hero[field] = {other: {k: v for k, v in entry.items() if k != 'type'}
+                           for other, entry in info[field].items()}
+            types = {other: entry['type'] for other, entry in info[field].items() if 'type' in entry}
+            if types: hero_text[f"{field}_types"] = types
+        numeric[name] = hero
+        text[name] = hero_text
+    return numeric, text
+
+
+class TextStore:
+    # Textos por héroe; el loader sólo se ejecuta en el primer acceso
+    def __init__(self, loader):
+        self._loader = loader
+        self._text = None
+
+    @property
+    def loaded(self):
+        return self._text is not None
+
+    def get(self, hero_name):
+        if self._text is None:
+            self._text = self._loader()
+        return self._text.get(hero_name, {})
+
+
+def source_hash(source_path):
+    with open(source_path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def write_pack(source_path, pack_path):
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    content = json.loads(raw.decode('utf-8'))
+    numeric, text = split_text(content.get('heroes', content))
+    numeric_block = marshal.dumps(numeric)
+    text_block = marshal.dumps(text)
+    header = HEADER.pack(PACK_MAGIC, PACK_VERSION, sys.version_info[0], sys.version_info[1],
+                         hashlib.sha256(raw).digest(), len(numeric_block), len(text_block))
+    with open(pack_path, 'wb') as f:
+        f.write(header + numeric_block + text_block)
+    return len(header) + len(numeric_block) + len(text_block)
+
+
+def load_pack(pack_path, source_path):
+    # Devuelve (heroes_numéricos, TextStore) o None si el pack falta o no es válido
+    try:
+        with open(pack_path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size: return None
+            magic, version, py_major, py_minor, digest, numeric_len, text_len = HEADER.unpack(header)
+            if (magic != PACK_MAGIC or version != PACK_VERSION
+                    or (py_major, py_minor) != sys.version_info[:2]):
+                return None
+            if digest != source_hash(source_path): return None
+            numeric = marshal.loads(f.read(numeric_len))
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        return None
+
+    text_offset = HEADER.size + numeric_len
+
+    def load_text():
+        try:
+            with open(pack_path, 'rb') as f:
+                f.seek(text_offset)
+                return marshal.loads(f.read(text_len))
+        except (OSError, ValueError, EOFError, TypeError):
+            # El pack cambió después de arrancar: los textos salen del JSON original
+            with open(source_path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+            return split_text(content.get('heroes', content))[1]
+
+    return numeric, TextStore(load_text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila data.json a un pack binario de carga rápida")
+    parser.add_argument("source", nargs="?", default="data.json")
+    parser.add_argument("pack", nargs="?", help="por defecto, el nombre de source con extensión .bin")
+    args = parser.parse_args()
+
+    pack = args.pack or args.source.rsplit('.', 1)[0] + '.bin'
+    try:
+        size = write_pack(args.source, pack)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    except ValueError:
+        print(f"Error: JSON inválido en {args.source}", file=sys.stderr)
+        raise SystemExit(1)
+    print(f"{args.source} -> {pack} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# draft.py
+# Motor de draft: busca la secuencia alterna de baneos y picks con minimax (negamax)
+# y poda alfa-beta, tabla de transposiciones y profundización iterativa con límite de tiempo.
+# Las hojas se puntúan con las mismas reglas que calculate_score (total aliado - total enemigo).
+# Uso: python draft.py [--budget 500] [--allies A,B] [--enemies C] [--bans D,E]
+import argparse
+import math
+import time
+
+from main import Analyzer, ROLES, SLOT_ROLES, exit_on_load_errors
+
+ALLY, ENEMY = 'allies', 'enemies'
+# Orden del draft: 4 baneos alternos y picks 1-2-2-2-2-1
+DRAFT_SEQUENCE = (('ban', ALLY), ('ban', ENEMY), ('ban', ALLY), ('ban', ENEMY),
+                  ('pick', ALLY), ('pick', ENEMY), ('pick', ENEMY), ('pick', ALLY), ('pick', ALLY),
+                  ('pick', ENEMY), ('pick', ENEMY), ('pick', ALLY), ('pick', ALLY), ('pick', ENEMY))
+BAN_SLOTS = sum(1 for kind, _ in DRAFT_SEQUENCE if kind == 'ban')
+DEFAULT_BUDGET_MS = 500
+BRANCH_LIMIT = 10  # jugadas candidatas por nodo (las mejores según la ordenación heurística)
+CHECK_EVERY = 256  # nodos entre comprobaciones del reloj
+EXACT, LOWER, UPPER = 0, 1, 2
+ROLE_LIMITS = [SLOT_ROLES.count(role) for role in ROLES]
+
+
+class _Timeout(Exception):
+    pass
+
+
+def remaining_sequence(bans, allies, enemies, sequence=DRAFT_SEQUENCE):
+    # Acciones pendientes: cada acción de la secuencia consume un baneo/pick ya hecho si lo hay
+    done = {'ban': len(bans), ALLY: len(allies), ENEMY: len(enemies)}
+    pending = []
+    for kind, side in sequence:
+        key = 'ban' if kind == 'ban' else side
+        if done[key] > 0: done[key] -= 1
+        else: pending.append((kind, side))
+    return tuple(pending)
+
+
+class DraftEngine:
+    def __init__(self, analyzer, sequence=DRAFT_SEQUENCE, branch=BRANCH_LIMIT):
+        self.an = analyzer
+        self.sequence = sequence
+        self.branch = branch
+        self.table = {}  # (aliados, enemigos, baneos, plies restantes) -> (profundidad, valor, tipo, jugada)
+        self.nodes = 0
+        self.name_order = sorted(range(len(analyzer.hero_names)), key=analyzer.hero_names.__getitem__)
+        # Columnas dispersas de sinergia: synergy_cols[a] = [(h, synergy[h][a]), ...] (como matchup_cols)
+        self.synergy_cols = [[(h, v) for h, v in enumerate(col) if v] for col in zip(*analyzer.synergy)]
+
+    # --- evaluación ---
+    def team_total(self, team, opponents):
+        an = self.an
+        comp = an.get_comp_stats_ids(opponents)
+        return sum(an.score_ids(h, [a for a in team if a != h], opponents, comp) for h in team)
+
+    def evaluate(self, allies, enemies):
+        # Desde el punto de vista aliado
+        return self.team_total(allies, enemies) - self.team_total(enemies, allies)
+
+    def rollout(self, plies, allies, enemies, bans):
+        # Completa el draft de forma voraz (cada equipo toma su mejor jugada inmediata) y puntúa
+        # las composiciones resultantes: así un baneo se valora por la mejor comp que aún deja al rival.
+        # Los valores heurísticos de cada bando se actualizan por columnas en cada pick
+        an = self.an
+        role_vec, order = an.role_vec, self.name_order
+        teams = {ALLY: list(allies), ENEMY: list(enemies)}
+        values = {ALLY: self._values(allies, enemies), ENEMY: self._values(enemies, allies)}
+        counts = {side: self._role_counts(team) for side, team in teams.items()}
+        bans = set(bans)
+        for kind, side in plies:
+            # Un baneo quita la mejor opción del rival
+            target = side if kind == 'pick' else (ENEMY if side == ALLY else ALLY)
+            team, count = teams[target], counts[target]
+            blocked = bans.union(team) if kind == 'pick' else bans.union(team, teams[side])
+            open_roles = [c < limit for c, limit in zip(count, ROLE_LIMITS)]
+            pool = [h for h in order if open_roles[role_vec[h]] and h not in blocked]
+            if not pool: continue
+            h = max(pool, key=values[target].__getitem__)  # en empate gana el primero por nombre
+            if kind == 'ban':
+                bans.add(h)
+                continue
+            team.append(h)
+            count[role_vec[h]] += 1
+            value, other = values[target], values[ENEMY if side == ALLY else ALLY]
+            for x, v in self.synergy_cols[h]: value[x] += v
+            for x, v in an.matchup_cols[h]: other[x] += v
+        return self.evaluate(teams[ALLY], teams[ENEMY])
+
+    def _role_counts(self, team):
+        counts = [0] * len(ROLES)
+        for h in team: counts[self.an.role_vec[h]] += 1
+        return counts
+
+    def _values(self, team, opponents):
+        # Valor heurístico de cada héroe para un equipo: base + matchups contra el rival + sinergias
+        an = self.an
+        values = list(an.base_bonus)
+        for e in opponents:
+            for x, v in an.matchup_cols[e]: values[x] += v
+        for a in team:
+            for x, v in self.synergy_cols[a]: values[x] += v
+        return values
+
+    # --- generación y ordenación de jugadas ---
+    def moves(self, kind, side, allies, enemies, bans, limit=None):
+        # Jugadas legales ordenadas por valor heurístico; un baneo quita lo que más le sirve al rival
+        an = self.an
+        team, opponents = (allies, enemies) if side == ALLY else (enemies, allies)
+        if kind == 'ban': team, opponents = opponents, team
+        values, counts = self._values(team, opponents), self._role_counts(team)
+        pool = [h for h in range(len(an.hero_names))
+                if h not in bans and h not in team and (kind == 'pick' or h not in opponents)
+                and counts[an.role_vec[h]] < ROLE_LIMITS[an.role_vec[h]]]
+        pool.sort(key=lambda h: (-values[h], an.hero_names[h]))
+        return pool[:limit or self.branch]
+
+    # --- búsqueda ---
+    def _negamax(self, plies, allies, enemies, bans, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self._deadline: raise _Timeout()
+
+        sign = 1 if not plies or plies[0][1] == ALLY else -1
+        if not plies:
+            return sign * self.evaluate(allies, enemies), None
+        if depth == 0:
+            return sign * self.rollout(plies, allies, enemies, bans), None
+
+        key = (frozenset(allies), frozenset(enemies), bans, len(plies))
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, value, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT: return value, tt_move
+                if flag == LOWER: alpha = max(alpha, value)
+                elif flag == UPPER: beta = min(beta, value)
+                if alpha >= beta: return value, tt_move
+
+        kind, side = plies[0]
+        candidates = self.moves(kind, side, allies, enemies, bans)
+        if not candidates:
+            # Sin jugadas legales (roster agotado): se salta la acción
+            return self._child_value(plies[1:], side, sign, (allies, enemies, bans), depth, alpha, beta), None
+        if tt_move in candidates:
+            candidates.remove(tt_move)
+            candidates.insert(0, tt_move)  # la mejor jugada de la iteración anterior primero
+
+        alpha_orig, best_value, best_move = alpha, float('-inf'), None
+        for h in candidates:
+            if kind == 'ban': child = (allies, enemies, bans | {h})
+            elif side == ALLY: child = (allies + (h,), enemies, bans)
+            else: child = (allies, enemies + (h,), bans)
+            value = self._child_value(plies[1:], side, sign, child, depth - 1, alpha, beta)
+            if value > best_value: best_value, best_move = value, h
+            alpha = max(alpha, value)
+            if alpha >= beta: break
+
+        flag = UPPER if best_value <= alpha_orig else LOWER if best_value >= beta else EXACT
+        self.table[key] = (depth, best_value, flag, best_move)
+        return best_value, best_move
+
+    def _child_value(self, rest, side, sign, child, depth, alpha, beta):
+        # Valor del hijo visto por `side`
+        if not rest:
+            return sign * self.evaluate(child[0], child[1])
+        if rest[0][1] == side:
+            # Dos acciones seguidas del mismo equipo: no se cambia de signo
+            return self._negamax(rest, *child, depth, alpha, beta)[0]
+        return -self._negamax(rest, *child, depth, -beta, -alpha)[0]
+
+    def principal_variation(self, plies, allies, enemies, bans):
+        line = []
+        while plies:
+            kind, side = plies[0]
+            entry = self.table.get((frozenset(allies), frozenset(enemies), bans, len(plies)))
+            if entry is None or entry[3] is None:
+                if self.moves(kind, side, allies, enemies, bans, limit=1): break
+                plies = plies[1:]  # acción sin jugadas legales: se salta
+                continue
+            h = entry[3]
+            line.append((kind, side, self.an.hero_names[h]))
+            if kind == 'ban': bans = bans | {h}
+            elif side == ALLY: allies = allies + (h,)
+            else: enemies = enemies + (h,)
+            plies = plies[1:]
+        return line
+
+    def search(self, allies, enemies, bans, budget_ms=DEFAULT_BUDGET_MS, max_depth=None):
+        # Devuelve la mejor acción para quien mueve, el valor esperado (visto por los aliados),
+        # la línea principal y las estadísticas de la búsqueda
+        if not math.isfinite(budget_ms) or budget_ms <= 0:
+            raise ValueError("budget_ms debe ser un número positivo")
+        an = self.an
+        ally_ids = tuple(an.to_ids(h for h in allies if h))
+        enemy_ids = tuple(an.to_ids(h for h in enemies if h))
+        ban_ids = frozenset(an.to_ids(h for h in bans if h))
+        plies = remaining_sequence(ban_ids, ally_ids, enemy_ids, self.sequence)
+        start = time.perf_counter()
+        self._deadline = start + budget_ms / 1000
+        self.nodes = 0
+        result = {"action": None, "value": round(self.rollout(plies, ally_ids, enemy_ids, ban_ids), 1), "depth": 0,
+                  "pv": [], "nodes": 0, "elapsed_ms": 0.0, "nps": 0.0}
+
+        max_depth = min(max_depth or len(plies), len(plies))
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self._negamax(plies, ally_ids, enemy_ids, ban_ids, depth, float('-inf'), float('inf'))
+            except _Timeout:
+                break
+            if move is None: break
+            kind, side = plies[0]
+            result.update(action=(kind, side, an.hero_names[move]), depth=depth,
+                          value=round(value if side == ALLY else -value, 1),
+                          pv=self.principal_variation(plies, ally_ids, enemy_ids, ban_ids))
+            if time.perf_counter() > self._deadline: break
+
+        elapsed = time.perf_counter() - start
+        result.update(nodes=self.nodes, elapsed_ms=elapsed * 1000, nps=self.nodes / max(elapsed, 1e-9))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recomendación de baneo/pick por búsqueda minimax")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="ms por búsqueda")
+    parser.add_argument("--allies", default="")
+    parser.add_argument("--enemies", default="")
+    parser.add_argument("--bans", default="")
+    args = parser.parse_args()
+
+    split = lambda text: [h.strip() for h in text.split(",") if h.strip()]
+    analyzer = Analyzer('data.json', 'bans.json')
+    exit_on_load_errors(analyzer)
+    engine = DraftEngine(analyzer)
+    result = engine.search(split(args.allies), split(args.enemies), split(args.bans), args.budget)
+    if result["action"] is None:
+        print("El draft ya está completo.")
+        return
+    kind, side, hero = result["action"]
+    print(f"{kind} ({side}): {hero} | valor esperado {result['value']:+} | profundidad {result['depth']}")
+    print(f"{result['nodes']} nodos en {result['elapsed_ms']:.0f} ms ({result['nps']:.0f} nodos/s)")
+    for kind, side, hero in result["pv"]:
+        print(f"  {kind:<4} {side:<8} {hero}")
+
+
+if __name__ == "__main__":
+    main()
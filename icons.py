@@ -0,0 +1,263 @@
+# icons.py
+# Atlas de iconos pre-escalados: un PNG por tamaño con todos los héroes y un
+# manifiesto (héroe -> posición). Se regenera si cambia algún PNG de origen.
+# Uso: python icons.py  (construye los atlas para los héroes de data.json)
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# PIL se importa dentro de cada función: su import es caro y el arranque no lo necesita
+
+IMG_DIR = "img"
+IMG_EXTENSION = ".png"
+ATLAS_DIR = os.path.join(IMG_DIR, ".atlas")
+ATLAS_SIZES = (40, 70, 80)
+MANIFEST_FILENAME = "manifest.json"
+ATLAS_VERSION = 1
+ICON_CACHE_BYTES = 2 * 1024 * 1024  # presupuesto de la caché de PhotoImage (RGBA sin comprimir)
+ICON_WORKERS = 2
+
+
+def resolve_icon_path(hero_name, img_dir=IMG_DIR):
+    # Prueba los nombres de fichero habituales ("Soldier: 76" -> "Soldier76.png", etc.)
+    clean_name = "".join(c for c in hero_name if c.isalnum())
+    candidates = [
+        hero_name.replace(":", " ").replace("/", ""),
+        clean_name,
+        hero_name.replace(" ", "-").replace(":", "-"),
+        hero_name.lower()
+    ]
+    for c in candidates:
+        path = os.path.join(img_dir, f"{c}{IMG_EXTENSION}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def build_atlases(hero_names, img_dir=IMG_DIR, atlas_dir=ATLAS_DIR, sizes=ATLAS_SIZES):
+    # Decodifica cada PNG una sola vez y lo escala a todos los tamaños
+    from PIL import Image
+    os.makedirs(atlas_dir, exist_ok=True)
+    manifest_path = os.path.join(atlas_dir, MANIFEST_FILENAME)
+    if os.path.exists(manifest_path): os.remove(manifest_path)
+    sources = {}
+    for name in hero_names:
+        path = resolve_icon_path(name, img_dir)
+        if path: sources[name] = [os.path.relpath(path, img_dir)] + _source_stamp(path)
+
+    names = sorted(sources)
+    columns = max(1, math.ceil(math.sqrt(len(names))))
+    rows = max(1, math.ceil(len(names) / columns))
+    sheets = {size: Image.new('RGBA', (columns * size, rows * size), (0, 0, 0, 0)) for size in sizes}
+    offsets = {size: {} for size in sizes}
+
+    for i, name in enumerate(names):
+        with Image.open(os.path.join(img_dir, sources[name][0])) as src:
+            src = src.convert('RGBA')
+            for size in sizes:
+                x, y = (i % columns) * size, (i // columns) * size
+                sheets[size].paste(src.resize((size, size), Image.Resampling.LANCZOS), (x, y))
+                offsets[size][name] = [x, y]
+
+    manifest = {"version": ATLAS_VERSION, "sources": sources, "atlases": {}}
+    for size in sizes:
+        filename = f"atlas_{size}.png"
+        sheets[size].save(os.path.join(atlas_dir, filename))
+        manifest["atlases"][str(size)] = {"file": filename, "offsets": offsets[size]}
+
+    # El manifiesto se escribe al final: sin él, un atlas a medio generar no se usa
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+class IconAtlas:
+    def __init__(self, hero_names, img_dir=IMG_DIR, atlas_dir=ATLAS_DIR):
+        self.hero_names = list(hero_names)
+        self.img_dir = img_dir
+        self.atlas_dir = atlas_dir
+        self.manifest = None
+        self._sheets = {}
+        self._lock = threading.Lock()  # get() se llama desde los hilos del IconLoader
+
+    def load(self):
+        # Devuelve True si el manifiesto existe y coincide con los PNG actuales
+        self.manifest = None
+        self._sheets = {}
+        path = os.path.join(self.atlas_dir, MANIFEST_FILENAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if manifest.get("version") != ATLAS_VERSION: return False
+        sources = manifest.get("sources", {})
+        for name in self.hero_names:
+            entry = sources.get(name)
+            if entry is None:
+                # Héroe nuevo: sólo es válido si sigue sin tener imagen
+                if resolve_icon_path(name, self.img_dir): return False
+                continue
+            try:
+                if _source_stamp(os.path.join(self.img_dir, entry[0])) != entry[1:]: return False
+            except OSError:
+                return False
+
+        self.manifest = manifest
+        return True
+
+    def build(self):
+        try:
+            build_atlases(self.hero_names, self.img_dir, self.atlas_dir)
+        except OSError as e:
+            print(f"Error generando atlas de iconos: {e}")
+            return False
+        return self.load()
+
+    def get(self, hero_name, size):
+        # Recorte PIL del icono pre-escalado, o None si no está en el atlas
+        if self.manifest is None: return None
+        atlas = self.manifest["atlases"].get(str(size))
+        if atlas is None or hero_name not in atlas["offsets"]: return None
+
+        with self._lock:
+            sheet = self._sheets.get(size)
+            if sheet is None:
+                from PIL import Image
+                try:
+                    with Image.open(os.path.join(self.atlas_dir, atlas["file"])) as f:
+                        sheet = f.copy()
+                except OSError:
+                    return None
+                self._sheets[size] = sheet
+
+        x, y = atlas["offsets"][hero_name]
+        return sheet.crop((x, y, x + size, y + size))
+
+
+class PhotoCache:
+    # LRU de imágenes con presupuesto en bytes y contadores de aciertos/fallos
+    def __init__(self, max_bytes=ICON_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items = OrderedDict()  # key -> (imagen, bytes)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def put(self, key, image, nbytes):
+        if key in self._items:
+            self.bytes -= self._items.pop(key)[1]
+        self._items[key] = (image, nbytes)
+        self.bytes += nbytes
+        # Nunca se expulsa la entrada recién añadida
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, size) = self._items.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._items), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class IconLoader:
+    # Decodifica y escala los iconos (PIL) en un pool de hilos. La conversión a
+    # ImageTk.PhotoImage la hace siempre el hilo de Tk con take_ready().
+    def __init__(self, atlas, img_dir=IMG_DIR, workers=ICON_WORKERS):
+        self.atlas = atlas
+        self.img_dir = img_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="icons")
+        self._pending = {}  # (héroe, size) -> Future
+        self.preloaded = 0
+        self.sync_decodes = 0
+
+    def decode(self, hero_name, size):
+        pil_image = self.atlas.get(hero_name, size[0]) if size[0] == size[1] else None
+        if pil_image is None:
+            path = resolve_icon_path(hero_name, self.img_dir)
+            if path is None: return None
+            from PIL import Image
+            with Image.open(path) as f:
+                pil_image = f.resize(size, Image.Resampling.LANCZOS)
+        return pil_image
+
+    def _safe_decode(self, hero_name, size):
+        try:
+            return self.decode(hero_name, size)
+        except Exception:
+            return None
+
+    def submit(self, hero_name, size):
+        key = (hero_name, size)
+        if key not in self._pending:
+            self._pending[key] = self.executor.submit(self._safe_decode, hero_name, size)
+
+    def preload(self, hero_names, sizes):
+        # El pool atiende las tareas en orden de envío: primero lo más prioritario
+        for name in hero_names:
+            for size in sizes:
+                self.submit(name, size)
+
+    def pending(self):
+        return len(self._pending)
+
+    def take(self, hero_name, size):
+        # Resultado para un fallo de caché: espera sólo si la decodificación ya está en marcha.
+        # Si aún está en cola (puede ir detrás de toda la precarga) se cancela y se decodifica aquí
+        future = self._pending.pop((hero_name, size), None)
+        if future is not None and not future.cancel():
+            return future.result()
+        self.sync_decodes += 1
+        return self._safe_decode(hero_name, size)
+
+    def take_ready(self, limit=None):
+        ready = []
+        for key, future in list(self._pending.items()):
+            if limit is not None and len(ready) >= limit: break
+            if future.done():
+                del self._pending[key]
+                if not future.cancelled() and future.result() is not None:
+                    ready.append((key, future.result()))
+                    self.preloaded += 1
+        return ready
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+
+
+if __name__ == "__main__":
+    with open('data.json', 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    heroes = content.get('heroes', content)
+    manifest = build_atlases(list(heroes))
+    print(f"Atlas generados en {ATLAS_DIR}: {len(manifest['sources'])} héroes x {len(ATLAS_SIZES)} tamaños")
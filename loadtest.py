@@ -0,0 +1,95 @@
+# loadtest.py
+# Prueba de carga local contra server.py con conexiones persistentes.
+# Uso: python loadtest.py [--port 8765] [--clients 8] [--requests 2000] [--endpoint score]
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+
+from main import Analyzer, SLOT_ROLES, exit_on_load_errors
+
+
+def random_team(rnd, by_role):
+    team, used = [], set()
+    for role in SLOT_ROLES:
+        hero = rnd.choice([h for h in by_role[role] if h not in used])
+        used.add(hero)
+        team.append(hero)
+    return team
+
+
+def make_payload(rnd, by_role, endpoint, batch_size):
+    allies, enemies = random_team(rnd, by_role), random_team(rnd, by_role)
+    if endpoint == "score":
+        return {"hero": allies[0], "allies": allies, "enemies": enemies}
+    if endpoint == "recommendations":
+        return {"allies": allies, "enemies": enemies, "bans": []}
+    if endpoint == "analysis":
+        return {"hero": allies[0], "allies": allies, "enemies": enemies, "lang": "en"}
+    if endpoint == "score_batch":
+        rows = [(random_team(rnd, by_role), random_team(rnd, by_role)) for _ in range(batch_size)]
+        return {"allies": [a for a, _ in rows], "enemies": [e for _, e in rows]}
+    return {"requests": [{"method": "score", "params": {"hero": allies[i], "allies": allies, "enemies": enemies}}
+                         for i in range(len(allies))]}
+
+
+def client(host, port, payloads, latencies, errors):
+    conn = http.client.HTTPConnection(host, port)  # una conexión reutilizada para todas sus peticiones
+    for path, payload in payloads:
+        body = json.dumps(payload)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200: errors.append(resp.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values: return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--endpoint", default="score",
+                        choices=["score", "recommendations", "analysis", "score_batch", "batch"])
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    analyzer = Analyzer('data.json', 'bans.json')
+    exit_on_load_errors(analyzer)
+    by_role = {role: [h for h in analyzer.hero_names if analyzer.data[h]['role'] == role] for role in set(SLOT_ROLES)}
+    rnd = random.Random(0)
+    per_client = [[(f"/{args.endpoint}", make_payload(rnd, by_role, args.endpoint, args.batch_size))
+                   for _ in range(args.requests // args.clients)] for _ in range(args.clients)]
+
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client, args=(args.host, args.port, p, latencies, errors)) for p in per_client]
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{args.endpoint}: {len(latencies)} ok, {len(errors)} errores en {elapsed:.2f} s")
+    print(f"  {len(latencies) / elapsed:.0f} req/s | p50 {percentile(latencies, 50) * 1000:.2f} ms | "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ TRANSLATIONS = {
         "team_enemy": "ENEMIGOS",
         "btn_analyze": "📊 SUGERIR MEJOR CAMBIO",
         "btn_reset": "🗑️ RESETEAR",
+        "chk_expected": "Puntuación esperada",
+        "load_errors_title": "Problemas al cargar",
+        "load_errors_msg": "No se pudieron cargar algunos ficheros; se usan los valores por defecto:\n\n{}",
         "btn_lang": "ES",  # Indica el idioma actual
         "menu_options": "Opciones",
         "menu_theme": "Tema",
@@ -39,6 +42,8 @@ TRANSLATIONS = {
         "tech_data": " Datos Técnicos (2026) ",
         "lbl_hp": "HP Base:",
         "lbl_sub": "Sub-Rol:",
+        "lbl_threat": "Mayor amenaza: {} ({:+})",
+        "lbl_best_counter": "Mejor counter del rol: {} ({:+})",
         "lbl_poke": "Poke:",
         "pros": "✅ Puntos Fuertes:",
         "cons": "⚠️ Riesgos Detectados:",
@@ -58,7 +63,20 @@ TRANSLATIONS = {
         "rep_others": "Otras opciones viables:",
         "msg_select_slot": "Selecciona un héroe en este hueco primero.",
         "msg_no_rec": "No se pudo generar recomendación.",
-        "btn_close": "Cerrar"
+        "msg_computing": "Calculando...",
+        "msg_stale": "La alineación ha cambiado. Cierra esta ventana y vuelve a pedir el análisis.",
+        "btn_close": "Cerrar",
+
+        # Diagnóstico
+        "diag_title": "Diagnóstico",
+        "diag_startup": "Arranque: {}",
+        "diag_refresh": "Refresco UI: {} escrituras -> {} actualizaciones | última {:.2f} ms | máx {:.2f} ms",
+        "diag_lineup": "Última actualización de scores: {evaluated} evaluados, {skipped} omitidos",
+        "diag_disabled": "Perfilado desactivado (arranca con --profile o OVERWATCHER_PROFILE=1).",
+        "diag_saved": "Guardado en {}",
+        "diag_no_cprofile": "cProfile no está activo (arranca con --cprofile).",
+        "btn_dump_pstats": "Guardar pstats",
+        "btn_dump_trace": "Guardar traza Chrome"
     },
     "en": {
         "app_title": "OW2 Coach 2026 - Season 1 Update",
@@ -67,6 +85,9 @@ TRANSLATIONS = {
         "team_enemy": "ENEMIES",
         "btn_analyze": "📊 SUGGEST BEST SWAP",
         "btn_reset": "🗑️ RESET",
+        "chk_expected": "Expected score",
+        "load_errors_title": "Loading problems",
+        "load_errors_msg": "Some files could not be loaded; default values are used:\n\n{}",
         "btn_lang": "EN", # Indicates current language
         "menu_options": "Options",
         "menu_theme": "Theme",
@@ -98,6 +119,8 @@ TRANSLATIONS = {
         "tech_data": " Technical Data (2026) ",
         "lbl_hp": "Base HP:",
         "lbl_sub": "Sub-Role:",
+        "lbl_threat": "Biggest threat: {} ({:+})",
+        "lbl_best_counter": "Best counter for the role: {} ({:+})",
         "lbl_poke": "Poke:",
         "pros": "✅ Strengths:",
         "cons": "⚠️ Detected Risks:",
@@ -117,7 +140,20 @@ TRANSLATIONS = {
         "rep_others": "Other viable options:",
         "msg_select_slot": "Select a hero in this slot first.",
         "msg_no_rec": "Could not generate recommendation.",
-        "btn_close": "Close"
+        "msg_computing": "Calculating...",
+        "msg_stale": "The lineup has changed. Close this window and run the analysis again.",
+        "btn_close": "Close",
+
+        # Diagnostics
+        "diag_title": "Diagnostics",
+        "diag_startup": "Startup: {}",
+        "diag_refresh": "UI refresh: {} writes -> {} updates | last {:.2f} ms | max {:.2f} ms",
+        "diag_lineup": "Last score update: {evaluated} evaluated, {skipped} skipped",
+        "diag_disabled": "Profiling disabled (start with --profile or OVERWATCHER_PROFILE=1).",
+        "diag_saved": "Saved to {}",
+        "diag_no_cprofile": "cProfile is not running (start with --cprofile).",
+        "btn_dump_pstats": "Save pstats",
+        "btn_dump_trace": "Save Chrome trace"
     }
 }
 
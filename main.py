@@ -1,145 +1,719 @@
+import profiling  # primero: marca el origen de la línea temporal de arranque
 import tkinter as tk
 from tkinter import ttk, messagebox, Menu
+import copy
 import json
 import os
-from PIL import Image, ImageTk 
+import sys
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import locales 
+import datapack
+import rules
+from icons import IconAtlas, IconLoader, PhotoCache
+# PIL / ImageTk se importan al pintar el primer icono o el banner, no al arrancar
+
+profiling.STARTUP.mark("import")
 
 # Configuración de ruta de imágenes
 IMG_DIR = "img" 
 IMG_EXTENSION = ".png" 
 BANNER_FILENAME = "banner.png"
 
+# Refresco de la UI: 0 = una actualización en el siguiente idle; >0 = agrupa las
+# escrituras de ese intervalo (ms) en una sola actualización
+REFRESH_DELAY_MS = 0
+DIRTY_ALL = ('bans', 'allies', 'enemies')
+
+# Recarga en caliente de data.json / bans.json (sondeo por mtime)
+RELOAD_POLL_MS = 2000
+
+# Sondeo de los resultados de recomendaciones/análisis calculados en segundo plano
+ANALYSIS_POLL_MS = 30
+
+ROLES = ("Tank", "Damage", "Support")
+SLOT_ROLES = ("Tank", "Damage", "Damage", "Support", "Support")
+
+# Tamaño de las cachés LRU del Analyzer (entradas)
+RECOMMEND_CACHE_SIZE = 256
+EXPECTED_CACHE_SIZE = 1024
+POPULARITY_PRIOR = 1  # peso de un héroe sin datos en bans.json (modo puntuación esperada)
+
+class LRUCache:
+    # LRU acotada por número de entradas, con contadores de aciertos/fallos.
+    # El lock permite compartirla entre los hilos del servidor.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._items.get(key, default)
+            if value is default:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            if len(self._items) > self.maxsize: self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        return {'entries': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+class HeroProfile:
+    # Perfil inmutable de un héroe con los valores por defecto ya resueltos; rol y sub-rol
+    # también como enteros (índice en ROLES / Analyzer.sub_role_names)
+    __slots__ = ('id', 'name', 'role', 'role_id', 'sub_role', 'sub_role_id', 'poke', 'survivability',
+                 'cc_susceptibility', 'team_dependency', 'health', 'archetype')
+
+    def __init__(self, hero_id, name, info, sub_role_id):
+        role = info.get('role')
+        values = {
+            'id': hero_id, 'name': name,
+            'role': sys.intern(role) if isinstance(role, str) else role,
+            'role_id': ROLES.index(role) if role in ROLES else ROLES.index('Damage'),
+            'sub_role': sys.intern(info.get('sub_role', 'General')), 'sub_role_id': sub_role_id,
+            'poke': info.get('damage_profile', {}).get('poke', 1),
+            'survivability': info.get('survivability', 0),
+            'cc_susceptibility': info.get('weakness_profile', {}).get('cc_susceptibility', 0),
+            'team_dependency': info.get('team_dependency', 3),
+            'health': info.get('health', "???"),
+            'archetype': tuple(info.get('archetype', ())),
+        }
+        for field in self.__slots__: object.__setattr__(self, field, values[field])
+
+    def __setattr__(self, field, value):
+        raise AttributeError("HeroProfile es inmutable")
+
+    def __repr__(self):
+        return f"HeroProfile({self.name!r}, {self.role}/{self.sub_role})"
+
 # --- CLASE DE LÓGICA Y DATOS ---
 class Analyzer:
-    def __init__(self, data_path, bans_path):
+    def __init__(self, data_path, bans_path, pack_path=None, autoload=True, rules_path=None):
         self.data_path = data_path
         self.bans_path = bans_path
+        self.rules_path = rules_path or rules.RULES_PATH
+        self.rules = rules.DEFAULT_RULES
+        # Versión compilada de data.json (python datapack.py); se ignora si no coincide el hash
+        self.pack_path = pack_path or os.path.splitext(data_path)[0] + '.bin'
         self.data = {}
+        self.text = datapack.TextStore(dict)
         self.ban_data = {}
-        self.load_data()
+        self._optimize_cache = {}
+        self._available_cache = {}
+        self.cache_counts = {'available': [0, 0], 'optimize': [0, 0]}  # [hits, misses]
+        # Cachés por alineación canónica (ver lineup_key); se vacían al compilar los datos. Sólo para
+        # resultados caros y repetidos: un score suelto es más barato de calcular que de buscar
+        self.lru_caches = self._new_lru_caches()
+        self._ban_pool = None
+        self._role_fill_cache = None
+        self.load_errors = []  # datos inutilizables: validate() y las herramientas CLI los rechazan
+        self.rules_warnings = []  # rules.json ausente o inválido: se puntúa con DEFAULT_RULES
+        if autoload: self.load_data()
 
     def load_data(self):
+        self.load_errors = []
+        self._load_heroes()
+        self._load_bans()
+        self._load_rules()
+        self._ban_pool = None
+        self.compile_data()
+
+    @staticmethod
+    def _new_lru_caches():
+        return {'recommendations': LRUCache(RECOMMEND_CACHE_SIZE), 'expected': LRUCache(EXPECTED_CACHE_SIZE)}
+
+    def reloaded(self, data_changed=True, bans_changed=True):
+        # Devuelve una instancia nueva con los ficheros cambiados re-leídos. La actual no se
+        # modifica, así que quien la esté usando nunca ve datos a medio cargar.
+        if not data_changed:
+            # Sólo bans.json (un cambio de reglas cuenta como data_changed): se comparten las tablas
+            # compiladas y los scorers, y sólo se rehacen las cachés que dependen de la popularidad
+            new = copy.copy(self)
+            new.load_errors = []
+            if bans_changed: new._load_bans()
+            new._ban_pool = new._role_fill_cache = None
+            new.lru_caches = self._new_lru_caches()
+            return new
+        new = Analyzer(self.data_path, self.bans_path, self.pack_path, autoload=False, rules_path=self.rules_path)
+        new._load_rules()  # pequeño: se relee siempre
+        new._load_heroes()
+        if bans_changed: new._load_bans()
+        else: new.ban_data = self.ban_data
+        new.compile_data()
+        return new
+
+    def validate(self):
+        # Problemas que impiden usar los datos cargados (lista vacía si son válidos)
+        problems = list(self.load_errors)
+        if not self.data: problems.append(f"{self.data_path}: no hay héroes")
+        for name, info in self.data.items():
+            if info.get('role') not in ROLES:
+                problems.append(f"{name}: rol desconocido {info.get('role')!r}")
+            for field in datapack.MATCHUP_FIELDS:
+                for other, entry in info.get(field, {}).items():
+                    if not isinstance(entry.get('score', 0), (int, float)):
+                        problems.append(f"{name}.{field}.{other}: score no numérico")
+        return problems
+
+    def _load_heroes(self):
         if os.path.exists(self.data_path):
-            try:
-                with open(self.data_path, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
-                    self.data = content.get('heroes', content)
-            except json.JSONDecodeError:
-                print(f"Error: JSON inválido en {self.data_path}")
+            pack = datapack.load_pack(self.pack_path, self.data_path)
+            if pack:
+                self.data, self.text = pack
+            else:
+                try:
+                    with open(self.data_path, 'r', encoding='utf-8') as f:
+                        content = json.load(f)
+                        numeric, text = datapack.split_text(content.get('heroes', content))
+                        self.data, self.text = numeric, datapack.TextStore(lambda: text)
+                except json.JSONDecodeError:
+                    print(f"Error: JSON inválido en {self.data_path}")
+                    self.load_errors.append(f"{self.data_path}: JSON inválido")
         else:
             self.data = {}
             print(f"Error: No se encontró {self.data_path}")
+            self.load_errors.append(f"{self.data_path}: no encontrado")
+
+    def _load_rules(self):
+        self.rules, self.rules_warnings = rules.load_rules(self.rules_path)
+        if self.rules_warnings:
+            print(f"Aviso: se usan las reglas integradas ({'; '.join(self.rules_warnings)})")
 
+    def _load_bans(self):
         if os.path.exists(self.bans_path):
             try:
                 with open(self.bans_path, 'r', encoding='utf-8') as f:
                     self.ban_data = json.load(f).get('popularity', {})
             except:
                 self.ban_data = {}
+                self.load_errors.append(f"{self.bans_path}: no se pudo leer")
+
+    def compile_data(self):
+        # Compila data.json a IDs enteros + matrices densas (listas por fila).
+        # Así calculate_score sólo indexa en lugar de recorrer dicts anidados.
+        names = list(self.data.keys())
+        n = len(names)
+        self.hero_names = names
+        self.hero_ids = {name: i for i, name in enumerate(names)}
+        self.heroes_by_role = {role: tuple(sorted(h for h in names if self.data[h].get('role') == role))
+                               for role in ROLES}
+        self._available_cache.clear()
+        self.sub_role_names = []
+        self.sub_role_ids = {}
+
+        self.matchup = [[0.0] * n for _ in range(n)]  # counters - countered_by
+        self.synergy = [[0.0] * n for _ in range(n)]
+        self.synergy_sets = []  # has_synergy depende de la presencia, no del valor
+        self.profiles = []  # HeroProfile por ID
+        scale = self.rules['matchup_scale']
+        syn_scale = self.rules.get('synergy_scale', 1.0)
+
+        for i, name in enumerate(names):
+            info = self.data[name]
+            s_role = info.get('sub_role', 'General')
+            if s_role not in self.sub_role_ids:
+                self.sub_role_ids[s_role] = len(self.sub_role_names)
+                self.sub_role_names.append(s_role)
+            self.profiles.append(HeroProfile(i, name, info, self.sub_role_ids[s_role]))
+
+            row = self.matchup[i]
+            for enemy, entry in info.get('counters', {}).items():
+                if enemy in self.hero_ids: row[self.hero_ids[enemy]] += entry.get('score', 0) * scale
+            for enemy, entry in info.get('countered_by', {}).items():
+                if enemy in self.hero_ids: row[self.hero_ids[enemy]] -= entry.get('score', 0) * scale
+
+            syn_row = self.synergy[i]
+            present = set()
+            for ally, entry in info.get('synergies', {}).items():
+                if ally in self.hero_ids:
+                    syn_row[self.hero_ids[ally]] = entry.get('score', 0) * syn_scale
+                    present.add(self.hero_ids[ally])
+            self.synergy_sets.append(frozenset(present))
+
+        # Vectores por atributo (struct-of-arrays) para los bucles de puntuación
+        profiles = self.profiles
+        self.profile_by_name = {p.name: p for p in profiles}
+        self.poke_vec = [p.poke for p in profiles]
+        self.sub_role_vec = [p.sub_role_id for p in profiles]
+        self.role_vec = [p.role_id for p in profiles]
+        self.survivability_vec = [p.survivability for p in profiles]
+        self.cc_vec = [p.cc_susceptibility for p in profiles]
+        self.dependency_vec = [p.team_dependency for p in profiles]
+
+        # Reglas de rules.json: sólo dependen del propio héroe, así que se pliegan aquí a una
+        # constante por héroe; score_ids usa funciones generadas a partir de ellas (ver rules.py)
+        self.flanker_id = self.sub_role_ids.get(self.rules['flanker_sub_role'], -1)
+        self.poke_threshold = self.rules['thresholds']['enemy_poke']
+        self.flank_threshold = self.rules['thresholds']['enemy_flankers']
+        folded = rules.fold(self.rules, profiles)
+        self.poke_bonus, self.flank_bonus, self.base_bonus, self.lonely_penalty = (folded[f] for f in rules.BONUS_FIELDS)
+        self.argument_rules = folded['arguments']
+
+        self._build_index()
+        self.scorers = rules.build_scorers(self)
+        self._role_fill_cache = None
+        self._optimize_cache.clear()
+        for cache in self.lru_caches.values(): cache.clear()
+
+    def _build_index(self):
+        # Índice de relaciones: por héroe, sus counters / countered_by / sinergias como tuplas
+        # (id, score) de mayor a menor score, y el índice inverso (quién declara la relación sobre él)
+        names = self.hero_names
+        order = lambda pairs: tuple(sorted(pairs, key=lambda p: (-p[1], names[p[0]])))
+        self.relations, self.reverse_relations = {}, {}
+        for field in datapack.MATCHUP_FIELDS:
+            forward = [[] for _ in names]
+            reverse = [[] for _ in names]
+            for i, name in enumerate(names):
+                for other, entry in self.data[name].get(field, {}).items():
+                    j = self.hero_ids.get(other)
+                    if j is None: continue
+                    forward[i].append((j, entry.get('score', 0)))
+                    reverse[j].append((i, entry.get('score', 0)))
+            self.relations[field] = [order(p) for p in forward]
+            self.reverse_relations[field] = [order(p) for p in reverse]
+
+        # Columnas no nulas de matchup: quién gana (o pierde) contra cada héroe
+        self.matchup_cols = [[] for _ in names]
+        for h in range(len(names)):
+            related = {j for j, _ in self.relations['counters'][h]}
+            related.update(j for j, _ in self.relations['countered_by'][h])
+            for j in sorted(related):
+                if self.matchup[h][j]: self.matchup_cols[j].append((h, self.matchup[h][j]))
+
+    def to_ids(self, heroes_list):
+        # Descarta huecos vacíos y nombres desconocidos
+        return [h for h in map(self.hero_ids.get, heroes_list) if h is not None]
+
+    def get_comp_stats_ids(self, hero_ids):
+        return (sum(map(self.poke_vec.__getitem__, hero_ids)),
+                list(map(self.sub_role_vec.__getitem__, hero_ids)).count(self.flanker_id))
+
+    def score_ids(self, hero_id, ally_ids, enemy_ids, enemy_comp=None):
+        # ally_ids no debe incluir al propio héroe; enemy_comp = (poke, flankers) precalculado
+        enemy_poke, enemy_flankers = enemy_comp or self.get_comp_stats_ids(enemy_ids)
+        return self.scorers[hero_id](ally_ids, enemy_ids, enemy_poke, enemy_flankers)
+
+    def lineup_key(self, hero_ids):
+        # Clave canónica de un equipo: IDs ordenados. Las reglas no dependen del hueco,
+        # así que [Ana, Kiriko] y [Kiriko, Ana] comparten clave.
+        return tuple(sorted(hero_ids))
+
+    def to_slot_ids(self, team):
+        # Conserva las posiciones: -1 marca un hueco vacío o un héroe desconocido
+        return [self.hero_ids.get(h, -1) if h else -1 for h in team]
+
+    def score_batch(self, allies_matrix, enemies_matrix):
+        # Puntúa N alineaciones (filas de 5 IDs, -1 = vacío). Devuelve (ally_scores, enemy_scores),
+        # N x 5 cada uno, igual que calculate_score. Sin NumPy no es una evaluación vectorizada:
+        # es un bucle por fila que se ahorra la resolución de nombres y calcula las estadísticas
+        # de cada equipo una sola vez por fila.
+        if len(allies_matrix) != len(enemies_matrix):
+            raise ValueError("allies_matrix y enemies_matrix deben tener el mismo número de filas")
+
+        n = len(self.hero_names)
+        scorers, comp_stats = self.scorers, self.get_comp_stats_ids
+
+        def team_scores(slots, team_ids, opp_ids, opp_comp):
+            return [scorers[h]([a for a in team_ids if a != h], opp_ids, *opp_comp) if 0 <= h < n else 0
+                    for h in slots]
+
+        ally_scores, enemy_scores = [], []
+        for allies_row, enemies_row in zip(allies_matrix, enemies_matrix):
+            allies = [int(h) for h in allies_row]
+            enemies = [int(h) for h in enemies_row]
+            ally_ids = [h for h in allies if 0 <= h < n]
+            enemy_ids = [h for h in enemies if 0 <= h < n]
+            ally_scores.append(team_scores(allies, ally_ids, enemy_ids, comp_stats(enemy_ids)))
+            enemy_scores.append(team_scores(enemies, enemy_ids, ally_ids, comp_stats(ally_ids)))
+        return ally_scores, enemy_scores
+
+    def cache_stats(self, name):
+        if name in self.lru_caches: return self.lru_caches[name].stats()
+        hits, misses = self.cache_counts[name]
+        return {'hits': hits, 'misses': misses}
 
     def get_sorted_heroes_for_bans(self):
-        return sorted(self.data.keys(), key=lambda x: (self.ban_data.get(x, 0), x), reverse=True)
+        # Sólo cambia al recargar data.json / bans.json
+        if self._ban_pool is None:
+            self._ban_pool = tuple(sorted(self.data.keys(), key=lambda x: (self.ban_data.get(x, 0), x), reverse=True))
+        return list(self._ban_pool)
+
+    def get_available_heroes(self, role, excluded=()):
+        # Héroes del rol (orden alfabético) menos los excluidos; vista cacheada por (rol, excluidos)
+        pool = self.heroes_by_role.get(role, ())
+        key = (role, frozenset(h for h in excluded if h in pool))
+        available = self._available_cache.get(key)
+        self.cache_counts['available'][available is None] += 1
+        if available is None:
+            available = tuple(h for h in pool if h not in key[1])
+            if len(self._available_cache) >= 1024: self._available_cache.clear()
+            self._available_cache[key] = available
+        return available
 
     def get_comp_stats(self, heroes_list):
         stats = {'total_poke': 0, 'sub_roles': {}}
-        active_heroes = [h for h in heroes_list if h and h in self.data]
         
-        for h in active_heroes:
-            info = self.data[h]
-            stats['total_poke'] += info.get('damage_profile', {}).get('poke', 1)
-            s_role = info.get('sub_role', 'General')
+        for h in self.to_ids(h for h in heroes_list if h):
+            stats['total_poke'] += self.poke_vec[h]
+            s_role = self.sub_role_names[self.sub_role_vec[h]]
             stats['sub_roles'][s_role] = stats['sub_roles'].get(s_role, 0) + 1
             
         return stats
 
-    def calculate_score(self, hero_name, allies, enemies):
-        if not hero_name or hero_name not in self.data: return 0
-        
-        hero_stats = self.data[hero_name]
-        score = 0
-        
-        my_sub_role = hero_stats.get('sub_role', 'General')
-        my_poke = hero_stats.get('damage_profile', {}).get('poke', 1)
-        my_role = hero_stats.get('role', 'Damage')
-
-        enemy_stats = self.get_comp_stats(enemies)
-        enemy_poke = enemy_stats['total_poke']
-        enemy_flankers = enemy_stats['sub_roles'].get('Flanker', 0)
-        
-        active_enemies = [e for e in enemies if e]
-        active_allies = [a for a in allies if a and a != hero_name]
-        
-        counters = hero_stats.get('counters', {})
-        countered_by = hero_stats.get('countered_by', {})
-        synergies = hero_stats.get('synergies', {})
-
-        for enemy in active_enemies:
-            if enemy in counters: score += counters[enemy].get('score', 0) * 1.5 
-            if enemy in countered_by: score -= countered_by[enemy].get('score', 0) * 1.5
-
-        has_synergy = False
-        for ally in active_allies:
-            if ally in synergies:
-                score += synergies[ally].get('score', 0)
-                has_synergy = True
-
-        if enemy_poke >= 12:
-            if my_sub_role == "Stalwart": score += 2.0
-            elif my_poke >= 4: score += 1.5
-            elif my_role == "Damage" and my_poke < 2 and my_sub_role != "Flanker": score -= 1.5
-
-        if enemy_flankers >= 2:
-            if my_role == "Support":
-                if my_sub_role in ["Survivor", "Tactician"]: score += 2.0
-                elif my_sub_role == "Medic" and hero_stats.get('survivability', 0) < 3: score -= 2.0
-            
-            if hero_stats.get('weakness_profile', {}).get('cc_susceptibility', 0) < 3:
-                if my_sub_role in ["Specialist", "Bruiser"]: score += 1.0
-
-        if my_sub_role in ["Sharpshooter", "Stalwart"]: score += 0.5
-
-        if hero_stats.get('team_dependency', 3) >= 4 and not has_synergy:
-            score -= 1
-
+    def calculate_score(self, hero_name, allies, enemies, bans=(), expected=False):
+        # API por nombres: un dict.get por nombre y la función generada del héroe, sin más copias.
+        # Quien ya tiene IDs (LineupState, score_batch, simulate, draft) llama a score_ids directamente.
+        # expected=True: los huecos enemigos vacíos cuentan con su valor esperado (ver enemy_fill)
+        ids = self.hero_ids
+        hero_id = ids.get(hero_name) if hero_name else None
+        if hero_id is None: return 0
+
+        enemy_ids = [e for e in map(ids.get, enemies) if e is not None]
+        ally_ids = [a for a in map(ids.get, allies) if a is not None and a != hero_id]
+        fill = self.enemy_fill(enemy_ids, self.to_ids(bans)) if expected else None
+        if fill: return self.score_expected(hero_id, ally_ids, enemy_ids, fill)
+        return self.scorers[hero_id](ally_ids, enemy_ids, *self.get_comp_stats_ids(enemy_ids))
+
+    # --- PUNTUACIÓN ESPERADA (huecos enemigos vacíos) ---
+    def enemy_fill(self, enemy_ids, ban_ids=()):
+        # Cada hueco enemigo vacío se rellena, de forma independiente, con un héroe de su rol
+        # (sin baneados ni enemigos ya elegidos) con probabilidad proporcional a su popularidad.
+        # Devuelve (fila esperada de matchup por héroe, P(poke >= umbral), P(flankers >= umbral)) calculados
+        # de forma exacta, o None si no hay huecos vacíos.
+        enemy_key = self.lineup_key(enemy_ids)
+        key = (enemy_key, frozenset(ban_ids))
+        fill = self.lru_caches['expected'].get(key)
+        if fill is None:
+            fill = self._compute_enemy_fill(enemy_key, key[1]) or ()
+            self.lru_caches['expected'].put(key, fill)
+        return fill or None
+
+    def _role_fill(self):
+        # Por rol, con todo el roster disponible: peso de cada héroe, peso total, suma ponderada
+        # de las columnas de matchup y pesos por resultado (poke, flanker). Se calcula una vez por
+        # versión de los datos; cada consulta sólo descuenta los baneados y enemigos conocidos.
+        if self._role_fill_cache is None:
+            n = len(self.hero_names)
+            weights = [self.ban_data.get(name, 0) + POPULARITY_PRIOR for name in self.hero_names]
+            tables = []
+            for role_idx in range(len(ROLES)):
+                row_sum, outcomes, total = [0.0] * n, {}, 0
+                for x in range(n):
+                    if self.role_vec[x] != role_idx: continue
+                    total += weights[x]
+                    for h, value in self.matchup_cols[x]: row_sum[h] += weights[x] * value
+                    outcome = self._fill_outcome(x)
+                    outcomes[outcome] = outcomes.get(outcome, 0) + weights[x]
+                tables.append((total, row_sum, outcomes))
+            self._role_fill_cache = (weights, tables)
+        return self._role_fill_cache
+
+    def _fill_outcome(self, x):
+        return self.poke_vec[x], 1 if self.sub_role_vec[x] == self.flanker_id else 0
+
+    def _compute_enemy_fill(self, enemy_key, ban_ids):
+        missing = [SLOT_ROLES.count(role) for role in ROLES]
+        for e in enemy_key: missing[self.role_vec[e]] -= 1
+        if not any(k > 0 for k in missing): return None
+
+        weights, tables = self._role_fill()
+        expected_row = [0.0] * len(self.hero_names)
+        taken = ban_ids.union(enemy_key)
+        # Distribución conjunta de (poke, flankers) del equipo enemigo, saturada en los umbrales
+        poke_cap, flank_cap = self.poke_threshold, self.flank_threshold
+        poke, flankers = self.get_comp_stats_ids(enemy_key)
+        dist = {(min(poke, poke_cap), min(flankers, flank_cap)): 1.0}
+        for role_idx, (role_total, row_sum, role_outcomes) in enumerate(tables):
+            k = missing[role_idx]
+            if k <= 0: continue
+            excluded = [x for x in taken if self.role_vec[x] == role_idx]
+            total = role_total - sum(weights[x] for x in excluded)
+            if total <= 0: continue
+
+            # Fila esperada de k huecos: k * sum(p(x) * matchup[h][x]) con p(x) = peso / total
+            scale = k / total
+            expected_row = [r + scale * v for r, v in zip(expected_row, row_sum)]
+            outcomes = dict(role_outcomes)
+            for x in excluded:
+                for h, value in self.matchup_cols[x]: expected_row[h] -= scale * weights[x] * value
+                outcomes[self._fill_outcome(x)] -= weights[x]
+            slot = [(outcome, w / total) for outcome, w in outcomes.items() if w > 0]
+            for _ in range(k):
+                step = {}
+                for (dp, df), p in dist.items():
+                    for (sp, sf), q in slot:
+                        dp2, df2 = dp + sp, df + sf
+                        state = (dp2 if dp2 < poke_cap else poke_cap, df2 if df2 < flank_cap else flank_cap)
+                        step[state] = step.get(state, 0.0) + p * q
+                dist = step
+
+        p_poke = sum(p for (dp, _), p in dist.items() if dp >= poke_cap)
+        p_flank = sum(p for (_, df), p in dist.items() if df >= flank_cap)
+        return expected_row, p_poke, p_flank
+
+    def score_expected(self, hero_id, ally_ids, enemy_ids, fill):
+        # score_ids con los enemigos conocidos (umbrales desactivados con comp (0, 0)) más
+        # la esperanza de los huecos vacíos y de los bonus de poke / flankers
+        expected_row, p_poke, p_flank = fill
+        score = self.score_ids(hero_id, ally_ids, enemy_ids, (0, 0))
+        score += expected_row[hero_id] + p_poke * self.poke_bonus[hero_id] + p_flank * self.flank_bonus[hero_id]
         return round(score, 1)
 
-    def get_recommendations(self, current_allies, enemies, bans, forced_idx=None):
+    def get_recommendations(self, current_allies, enemies, bans, forced_idx=None, expected=False):
+        # Los aliados conservan su posición (el resultado habla de huecos); enemigos y bans no
+        enemy_key = self.lineup_key(self.to_ids(enemies))
+        key = (tuple(current_allies), enemy_key, frozenset(bans), forced_idx, expected)
+        cached = self.lru_caches['recommendations'].get(key)
+        if cached is None:
+            cached = self._compute_recommendations(current_allies, enemies, enemy_key, bans, forced_idx, expected)
+            self.lru_caches['recommendations'].put(key, cached)
+        target_hero, candidates, scores = cached
+        return target_hero, list(candidates), list(scores)
+
+    def _compute_recommendations(self, current_allies, enemies, enemy_key, bans, forced_idx, expected=False):
+        fill = self.enemy_fill(enemy_key, self.to_ids(bans)) if expected else None
         scores = []
         for i, name in enumerate(current_allies):
-            val = self.calculate_score(name, current_allies, enemies) if name and name in self.data else -999
+            val = self.calculate_score(name, current_allies, enemies, bans, expected) if name and name in self.data else -999
             scores.append((i, val))
         
         target_idx = forced_idx if forced_idx is not None else min(scores, key=lambda x: x[1])[0]
         
-        if target_idx >= len(current_allies): return None, [], scores
+        if target_idx >= len(current_allies): return None, (), tuple(scores)
 
         target_hero = current_allies[target_idx]
         
         if target_hero and target_hero in self.data:
-            target_role = self.data[target_hero]['role']
+            target_role = self.profile_by_name[target_hero].role
         else:
-            target_role = "Tank" if target_idx == 0 else ("Damage" if target_idx in [1, 2] else "Support")
+            target_role = SLOT_ROLES[target_idx]
         
         candidates = []
         other_allies = [h for i, h in enumerate(current_allies) if i != target_idx and h]
-
-        for name, info in self.data.items():
-            if (info['role'] == target_role and 
-                name != target_hero and 
-                name not in other_allies and 
-                name not in bans):
+        # Mismos aliados y enemigos para todos los candidatos: se calculan una sola vez
+        ally_ids = self.to_ids(other_allies)
+        enemy_comp = self.get_comp_stats_ids(enemy_key)
+        excluded = set(other_allies)
+        excluded.update(bans)
+
+        for p in self.profiles:
+            if (p.role == target_role and 
+                p.name != target_hero and 
+                p.name not in excluded):
                 
-                temp_allies = current_allies[:] 
-                temp_allies[target_idx] = name
-                candidates.append((name, self.calculate_score(name, temp_allies, enemies)))
+                if fill: score = self.score_expected(p.id, ally_ids, enemy_key, fill)
+                else: score = self.score_ids(p.id, ally_ids, enemy_key, enemy_comp)
+                candidates.append((p.name, score))
         
         candidates.sort(key=lambda x: x[1], reverse=True)
-        return target_hero, candidates[:3], scores
+        return target_hero, tuple(candidates[:3]), tuple(scores)
+
+    def best_counters(self, enemies, exclude=(), role=None, k=3):
+        # Héroes con más ventaja de matchup sumada contra todo el equipo enemigo: [(héroe, total)]
+        totals = {}
+        for e in self.to_ids(h for h in enemies if h):
+            for h, value in self.matchup_cols[e]:
+                totals[h] = totals.get(h, 0) + value
+        excluded = set(exclude)
+        role_idx = ROLES.index(role) if role in ROLES else None
+        candidates = ((self.hero_names[h], round(total, 1)) for h, total in totals.items()
+                      if self.hero_names[h] not in excluded and (role_idx is None or self.role_vec[h] == role_idx))
+        return heapq.nsmallest(k, candidates, key=lambda c: (-c[1], c[0]))
+
+    def threat_ranking(self, enemies, allies):
+        # Enemigos ordenados por la ventaja de matchup que tienen sobre nuestros aliados: [(enemigo, total)]
+        ally_ids = self.to_ids(a for a in allies if a)
+        ranking = []
+        for e in dict.fromkeys(h for h in enemies if h in self.hero_ids):
+            row = self.matchup[self.hero_ids[e]]
+            ranking.append((e, round(sum(row[a] for a in ally_ids), 1)))
+        ranking.sort(key=lambda r: (-r[1], r[0]))
+        return ranking
+
+    def matchup_asymmetries(self):
+        # "A counters B" debería aparecer también como "B countered_by A" con el mismo score.
+        # Devuelve [(héroe, otro, campo, score, score_espejo o None)] para lo que no cuadra.
+        names = self.hero_names
+        result = []
+        for field, mirror in (('counters', 'countered_by'), ('countered_by', 'counters')):
+            for i, pairs in enumerate(self.relations[field]):
+                for j, score in pairs:
+                    back = self.data[names[j]].get(mirror, {}).get(names[i], {}).get('score')
+                    # Un score distinto se informa una sola vez (desde counters)
+                    if back is None or (field == 'counters' and back != score):
+                        result.append((names[i], names[j], field, score, back))
+        result.sort()
+        return result
+
+    def get_swap_gains(self, current_allies, enemies, bans=(), k=3):
+        # Mejores cambios individuales en cualquiera de los huecos aliados, en una sola pasada.
+        # Devuelve [(hueco, héroe, delta)] donde delta es la variación del total del equipo
+        # (incluye las sinergias que gana o pierde el resto). Empates: hueco y nombre.
+        enemy_key = self.lineup_key(self.to_ids(enemies))
+        key = ('swaps', tuple(current_allies), enemy_key, frozenset(bans), k)
+        cached = self.lru_caches['recommendations'].get(key)
+        if cached is None:
+            cached = tuple(self._compute_swap_gains(current_allies, enemy_key, bans, k))
+            self.lru_caches['recommendations'].put(key, cached)
+        return list(cached)
+
+    def _compute_swap_gains(self, current_allies, enemy_key, bans, k):
+        enemy_comp = self.get_comp_stats_ids(enemy_key)
+        slots = self.to_slot_ids(current_allies)
+        excluded = {h for h in current_allies if h}
+        excluded.update(bans)
+
+        def team_total(ids):
+            return sum(self.score_ids(h, [a for a in ids if a != h], enemy_key, enemy_comp) for h in ids)
+
+        base_total = team_total([h for h in slots if h >= 0])
+
+        def gains():
+            for i, current in enumerate(slots):
+                if current >= 0: role = ROLES[self.role_vec[current]]
+                elif i < len(SLOT_ROLES): role = SLOT_ROLES[i]
+                else: continue
+                rest = [h for j, h in enumerate(slots) if j != i and h >= 0]
+                # El candidato sólo cambia la puntuación del resto a través de sus sinergias
+                rest_total = team_total(rest)
+                lonely = [self.lonely_penalty[o] and not any(a != o and a in self.synergy_sets[o] for a in rest)
+                          for o in rest]
+                for name in self.heroes_by_role[role]:
+                    if name in excluded: continue
+                    c = self.hero_ids[name]
+                    total = rest_total + self.score_ids(c, rest, enemy_key, enemy_comp)
+                    for o, alone in zip(rest, lonely):
+                        if c in self.synergy_sets[o]:
+                            total += self.synergy[o][c] - (self.lonely_penalty[o] if alone else 0)
+                    yield i, name, round(total - base_total, 1)
+
+        # Selección parcial: sólo se mantienen k elementos en el heap
+        return heapq.nsmallest(k, gains(), key=lambda g: (-g[2], g[0], g[1]))
+
+    def optimize_composition(self, enemies, bans=(), locked_slots=None, k=1):
+        # Busca las k mejores alineaciones 1-2-2 completas (suma de calculate_score de
+        # los 5 aliados) por ramificación y poda. locked_slots: {slot: héroe} o lista de 5.
+        # Devuelve [(total, [tank, dps, dps, sup, sup]), ...] de mayor a menor.
+        if not isinstance(locked_slots, dict):
+            locked_slots = {i: h for i, h in enumerate(locked_slots or []) if h}
+        locked = {i: self.hero_ids[h] for i, h in locked_slots.items()
+                  if h in self.hero_ids and 0 <= i < len(SLOT_ROLES)}
+        enemy_ids = self.to_ids(enemies)
+
+        cache_key = (tuple(sorted(enemy_ids)), frozenset(bans), tuple(sorted(locked.items())), k)
+        if cache_key in self._optimize_cache:
+            self.cache_counts['optimize'][0] += 1
+            return list(self._optimize_cache[cache_key])
+        self.cache_counts['optimize'][1] += 1
+
+        enemy_poke, enemy_flankers = self.get_comp_stats_ids(enemy_ids)
+        n = len(self.hero_names)
+
+        # Parte del score que no depende de los aliados (counters + reglas de composición)
+        base = []
+        for h in range(n):
+            row = self.matchup[h]
+            value = sum(row[e] for e in enemy_ids) + self.base_bonus[h]
+            if enemy_poke >= self.poke_threshold: value += self.poke_bonus[h]
+            if enemy_flankers >= self.flank_threshold: value += self.flank_bonus[h]
+            base.append(value)
+
+        # Una pareja de aliados aporta la sinergia en ambos sentidos
+        syn = self.synergy
+        pair = [[syn[a][b] + syn[b][a] for b in range(n)] for a in range(n)]
+
+        taken = set(locked.values())
+        free_slots = [i for i in range(len(SLOT_ROLES)) if i not in locked]
+        pools = []
+        for slot in free_slots:
+            role = ROLES.index(SLOT_ROLES[slot])
+            pool = [h for h in range(n) if self.role_vec[h] == role and h not in taken
+                    and self.hero_names[h] not in bans]
+            pool.sort(key=lambda h: (-base[h], self.hero_names[h]))
+            pools.append(pool)
+        if any(len(pool) < free_slots.count(slot) for pool, slot in zip(pools, free_slots)):
+            return []
+
+        candidates = sorted({h for pool in pools for h in pool} | taken)
+        max_pair = max([0] + [pair[a][b] for a in candidates for b in candidates if a != b])
+
+        # Dos huecos libres seguidos del mismo rol son intercambiables: se exige orden
+        same_as_prev = [d > 0 and SLOT_ROLES[free_slots[d]] == SLOT_ROLES[free_slots[d - 1]]
+                        for d in range(len(free_slots))]
+
+        top = []  # min-heap de tamaño k: (total, nombres)
+
+        def upper_bound(depth, chosen):
+            bound = 0
+            for d in range(depth, len(free_slots)):
+                best = None
+                for c in pools[d]:
+                    if c in chosen: continue
+                    value = base[c] + sum(pair[c][s] for s in chosen)
+                    if best is None or value > best: best = value
+                bound += best if best is not None else 0
+            remaining = len(free_slots) - depth
+            return bound + remaining * (remaining - 1) / 2 * max_pair
+
+        def leaf(chosen):
+            total = 0
+            for h in chosen:
+                total += base[h] + sum(syn[h][o] for o in chosen if o != h)
+                if self.lonely_penalty[h] and not any(o in self.synergy_sets[h] for o in chosen if o != h):
+                    total += self.lonely_penalty[h]
+            lineup = [None] * len(SLOT_ROLES)
+            for slot, h in locked.items(): lineup[slot] = h
+            for slot, h in zip(free_slots, chosen[len(locked):]): lineup[slot] = h
+            item = (round(total, 1), tuple(self.hero_names[h] for h in lineup))
+            if len(top) < k: heapq.heappush(top, item)
+            elif item > top[0]: heapq.heapreplace(top, item)
+
+        def search(depth, chosen, value, start):
+            if depth == len(free_slots):
+                leaf(chosen)
+                return
+            pool = pools[depth]
+            for idx in range(start if same_as_prev[depth] else 0, len(pool)):
+                c = pool[idx]
+                if c in chosen: continue
+                new_value = value + base[c] + sum(pair[c][s] for s in chosen)
+                child = chosen + [c]
+                # Las penalizaciones sólo restan, así que ignorarlas da una cota superior válida
+                if len(top) == k and new_value + upper_bound(depth + 1, child) <= top[0][0]: continue
+                search(depth + 1, child, new_value, idx + 1)
+
+        start_chosen = list(locked.values())
+        start_value = sum(base[h] for h in start_chosen)
+        start_value += sum(pair[a][b] for i, a in enumerate(start_chosen) for b in start_chosen[i + 1:])
+        if k > 0: search(0, start_chosen, start_value, 0)
+
+        result = [(total, list(lineup)) for total, lineup in sorted(top, reverse=True)]
+        if len(self._optimize_cache) >= 256: self._optimize_cache.clear()
+        self._optimize_cache[cache_key] = result
+        return list(result)
 
     def get_tip(self, hero_name, lang='es'):
         if hero_name not in self.data: return locales.get_text(lang, 'no_tips')
-        hero_data = self.data[hero_name]
+        hero_data = self.text.get(hero_name)  # los textos se cargan bajo demanda
         raw_tips = hero_data.get('tips', None)
         
         if isinstance(raw_tips, dict):
@@ -154,26 +728,26 @@ class Analyzer:
 
     def generate_argument(self, hero_name, enemies, allies, lang='es'):
         info = self.data[hero_name]
+        profile = self.profile_by_name[hero_name]
         argumentos = []
         
-        sub_role = info.get('sub_role', 'General')
-        poke_val = info.get('damage_profile', {}).get('poke', 0)
-        enemy_stats = self.get_comp_stats(enemies)
-
-        if enemy_stats['total_poke'] >= 12 and (poke_val >= 4 or sub_role == "Stalwart"):
-             msg = locales.get_text(lang, 'arg_poke_res').format(sub_role=sub_role)
-             argumentos.append(msg)
+        sub_role = profile.sub_role
+        enemy_poke, enemy_flankers = self.get_comp_stats_ids(self.to_ids(enemies))
+        triggered = {'enemy_poke': enemy_poke >= self.poke_threshold,
+                     'enemy_flankers': enemy_flankers >= self.flank_threshold}
 
-        if enemy_stats['sub_roles'].get('Flanker', 0) >= 2 and sub_role in ["Survivor", "Bruiser"]:
-             msg = locales.get_text(lang, 'arg_anti_dive').format(sub_role=sub_role)
-             argumentos.append(msg)
+        # Argumentos de composición de rules.json (ya filtrados por los atributos del héroe)
+        for trigger, text_key in self.argument_rules[profile.id]:
+            if triggered[trigger]:
+                argumentos.append(locales.get_text(lang, text_key).format(sub_role=sub_role))
 
         active_enemies = [e for e in enemies if e]
         counters = info.get('counters', {})
+        counter_types = self.text.get(hero_name).get('counters_types', {})
         
         for enemy in active_enemies:
             if enemy in counters:
-                reason = counters[enemy].get('type', 'counter').replace('_', ' ')
+                reason = counter_types.get(enemy, 'counter').replace('_', ' ')
                 msg = locales.get_text(lang, 'arg_counter').format(enemy=enemy, reason=reason)
                 argumentos.append(msg)
 
@@ -185,18 +759,26 @@ class Analyzer:
     def get_hero_analysis(self, hero_name, allies, enemies, lang='es'):
         if not hero_name or hero_name not in self.data: return None
         info = self.data[hero_name]
+        profile = self.profile_by_name[hero_name]
         
         current_tip = self.get_tip(hero_name, lang)
         
         analysis = {
             "pros": [], "cons": [], "synergies": [],
             "tips": current_tip, 
-            "archetype": info.get('archetype', []),
-            "sub_role": info.get('sub_role', "General"),
-            "health": info.get('health', "???"),
-            "poke": info.get('damage_profile', {}).get('poke', 0)
+            "archetype": list(profile.archetype),
+            "sub_role": profile.sub_role,
+            "health": profile.health,
+            "poke": profile.poke,
+            "top_threat": None, "best_counter": None
         }
 
+        # Visión de equipo para el spotlight (índice de relaciones)
+        threats = self.threat_ranking(enemies, allies)
+        if threats and threats[0][1] > 0: analysis["top_threat"] = threats[0]
+        best = self.best_counters(enemies, exclude=[a for a in allies if a], role=profile.role, k=1)
+        if best and best[0][1] > 0: analysis["best_counter"] = best[0]
+
         active_enemies = [e for e in enemies if e]
         active_allies = [a for a in allies if a and a != hero_name]
 
@@ -212,6 +794,137 @@ class Analyzer:
         
         return analysis
 
+
+def exit_on_load_errors(analyzer):
+    # Herramientas de línea de comandos: con datos ausentes o inválidos los resultados no serían
+    # los esperados, así que no se arranca. Sin rules.json se sigue con las reglas integradas
+    if analyzer.load_errors:
+        print("Error: " + "; ".join(analyzer.load_errors), file=sys.stderr)
+        raise SystemExit(1)
+
+# --- ESTADO INCREMENTAL DE LA ALINEACIÓN ---
+class LineupState:
+    # Guarda los scores por hueco de ambos equipos y, al cambiar un hueco,
+    # sólo re-puntúa a los héroes a los que ese cambio puede afectar.
+    SIDES = ('allies', 'enemies')
+
+    def __init__(self, analyzer, size=len(SLOT_ROLES)):
+        self.analyzer = analyzer
+        self.size = size
+        self.evaluations = 0  # acumulados desde el inicio
+        self.skipped = 0
+        self.last_update = {'evaluated': 0, 'skipped': 0}
+        self.expected = False  # modo puntuación esperada para los aliados (ver Analyzer.enemy_fill)
+        self.bans = frozenset()
+        self.reset()
+
+    def reset(self):
+        # Necesario tras recargar los datos: los IDs pueden haber cambiado
+        self.teams = {side: [-1] * self.size for side in self.SIDES}
+        self.scores = {side: [0] * self.size for side in self.SIDES}
+        self.comp = {side: (0, 0) for side in self.SIDES}
+        self.bans = frozenset()
+
+    def _other(self, side):
+        return 'enemies' if side == 'allies' else 'allies'
+
+    def _score_slot(self, side, idx):
+        h = self.teams[side][idx]
+        if h < 0:
+            self.scores[side][idx] = 0
+            return
+        ally_ids = [a for a in self.teams[side] if a >= 0 and a != h]
+        enemy_ids = [e for e in self.teams[self._other(side)] if e >= 0]
+        fill = self.analyzer.enemy_fill(enemy_ids, self.bans) if self.expected and side == 'allies' else None
+        if fill: self.scores[side][idx] = self.analyzer.score_expected(h, ally_ids, enemy_ids, fill)
+        else: self.scores[side][idx] = self.analyzer.score_ids(h, ally_ids, enemy_ids, self.comp[self._other(side)])
+        self.evaluations += 1
+
+    def configure(self, expected, bans=()):
+        # Cambia el modo esperado o los baneos que usa; devuelve True si ha re-puntuado a los aliados
+        ban_ids = frozenset(self.analyzer.to_ids(bans))
+        if expected == self.expected and (ban_ids == self.bans or not expected):
+            self.bans = ban_ids
+            return False
+        self.expected, self.bans = expected, ban_ids
+        for j, h in enumerate(self.teams['allies']):
+            if h >= 0: self._score_slot('allies', j)
+        return True
+
+    def set_slot(self, side, idx, hero_name):
+        # Devuelve (evaluados, omitidos) para este cambio
+        an = self.analyzer
+        team = self.teams[side]
+        new = an.hero_ids.get(hero_name, -1) if hero_name else -1
+        old = team[idx]
+        if new == old: return 0, 0
+
+        team[idx] = new
+        old_poke, old_flankers = self.comp[side]
+        self.comp[side] = an.get_comp_stats_ids([h for h in team if h >= 0])
+        new_poke, new_flankers = self.comp[side]
+        poke_flipped = (old_poke >= an.poke_threshold) != (new_poke >= an.poke_threshold)
+        flank_flipped = (old_flankers >= an.flank_threshold) != (new_flankers >= an.flank_threshold)
+
+        dirty = {side: {idx}, self._other(side): set()}
+        for j, h in enumerate(team):
+            if j != idx and h >= 0 and (old in an.synergy_sets[h] or new in an.synergy_sets[h]):
+                dirty[side].add(j)
+
+        for j, h in enumerate(self.teams[self._other(side)]):
+            if h < 0: continue
+            row = an.matchup[h]
+            if ((old >= 0 and row[old]) or (new >= 0 and row[new])
+                    or (poke_flipped and an.poke_bonus[h]) or (flank_flipped and an.flank_bonus[h])):
+                dirty[self._other(side)].add(j)
+        if self.expected and side == 'enemies':
+            # Los huecos enemigos que quedan vacíos cambian: todos los aliados dependen de ellos
+            dirty['allies'].update(j for j, h in enumerate(self.teams['allies']) if h >= 0)
+
+        before = self.evaluations
+        for s, slots in dirty.items():
+            for j in slots: self._score_slot(s, j)
+        evaluated = self.evaluations - before
+
+        occupied = sum(1 for s in self.SIDES for h in self.teams[s] if h >= 0)
+        skipped = max(occupied - evaluated, 0)
+        self.skipped += skipped
+        return evaluated, skipped
+
+    def sync(self, allies, enemies):
+        # Aplica sólo los huecos que han cambiado respecto al estado guardado
+        evaluated = skipped = 0
+        for side, names in (('allies', allies), ('enemies', enemies)):
+            for idx, name in enumerate(names[:self.size]):
+                e, s = self.set_slot(side, idx, name)
+                evaluated += e
+                skipped += s
+        self.last_update = {'evaluated': evaluated, 'skipped': skipped}
+        return self.last_update
+
+# --- VIGILANCIA DE FICHEROS ---
+class FileWatcher:
+    # Detecta cambios por (mtime, tamaño); poll() es barato y se llama desde root.after
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._stamps = {p: self._stamp(p) for p in self.paths}
+
+    def _stamp(self, path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def poll(self):
+        changed = set()
+        for p in self.paths:
+            stamp = self._stamp(p)
+            if stamp != self._stamps[p]:
+                self._stamps[p] = stamp
+                changed.add(p)
+        return changed
+
 # --- INTERFAZ GRÁFICA ---
 class App:
     def __init__(self, root):
@@ -224,58 +937,181 @@ class App:
 
         self.lang = 'en' 
         self.analyzer = Analyzer('data.json', 'bans.json')
+        self.lineup = LineupState(self.analyzer)
+        profiling.STARTUP.mark("data")
         
         self.ban_vars, self.ban_combos = [], []
+        self.expected_var = tk.BooleanVar(value=False)
         self.ally_vars, self.ally_checks, self.ally_combos, self.ally_score_labels, self.ally_img_labels = [], [], [], [], []
         self.enemy_vars, self.enemy_combos, self.enemy_score_labels, self.enemy_img_labels = [], [], [], []
         
-        self.image_cache = {} 
+        self.image_cache = PhotoCache() 
         self.menu_bar = None 
+
+        # Atlas de iconos pre-escalados + decodificación en segundo plano.
+        # Si el atlas está desactualizado se regenera en el pool sin bloquear la UI.
+        self.icon_atlas = IconAtlas(self.analyzer.data.keys(), IMG_DIR)
+        self.icon_loader = IconLoader(self.icon_atlas, IMG_DIR)
+        if not self.icon_atlas.load():
+            self.icon_loader.executor.submit(self.icon_atlas.build)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Recarga en caliente: se parsea y valida en un hilo y se sustituye el Analyzer entero
+        self.watcher = FileWatcher([self.analyzer.data_path, self.analyzer.bans_path, self.analyzer.rules_path])
+        self._reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reload")
+        self._reload_future = None
+        self._reload_changes = (False, False)
+        self._reload_pending = set()
+
+        # Recomendaciones y análisis se calculan fuera del hilo de Tk
+        self._analysis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        self._analysis_jobs = []
+
+        # Planificador de refresco: agrupa ráfagas de escrituras en las variables
+        self.refresh_delay_ms = REFRESH_DELAY_MS
+        self.refresh_stats = {'writes': 0, 'updates': 0, 'last_ms': 0.0, 'max_ms': 0.0, 'total_ms': 0.0}
+        self._refresh_job = None
+        self._dirty = set()
+        self._refreshing = False
         
+        # Arranque: primero el esqueleto de la ventana; listas, banner e iconos cuando ya se ha pintado
+        self.startup_report = False  # main.py --startup-report: imprime la línea temporal y sale
         self.setup_ui()
         self.create_menu() 
-        self.update_live_stats()
-        self.apply_language()
+        self.apply_language(refresh=False)
+        profiling.STARTUP.mark("skeleton")
+        self.root.after_idle(self._after_first_paint)
+        self.root.after(RELOAD_POLL_MS, self._poll_data_files)
+
+        # Contadores que muestra la ventana de diagnóstico (siempre disponibles)
+        profiling.PROFILER.register_cache("icons", self.image_cache.stats)
+        profiling.PROFILER.register_cache("combo lists", lambda: self.analyzer.cache_stats('available'))
+        profiling.PROFILER.register_cache("optimize", lambda: self.analyzer.cache_stats('optimize'))
+        for name in ('recommendations', 'expected'):
+            profiling.PROFILER.register_cache(name.replace('_', ' '), lambda name=name: self.analyzer.cache_stats(name))
+        profiling.PROFILER.register_cache("lineup scores", lambda: {'hits': self.lineup.skipped,
+                                                                    'misses': self.lineup.evaluations})
 
     def t(self, key):
         return locales.get_text(self.lang, key)
 
+    def _after_first_paint(self):
+        # Los idle de Tk se atienden en orden: al llegar aquí la ventana ya se ha dibujado.
+        # El after() deja pasar los eventos de exposición antes del trabajo pesado.
+        profiling.STARTUP.mark("first paint")
+        self.root.after(1, self._finish_startup)
+
+    def _finish_startup(self):
+        self._dirty.update(DIRTY_ALL)
+        self._flush_refresh()  # listas de los combos: desde aquí la ventana es usable
+        profiling.STARTUP.mark("interactive")
+        if self.startup_report:
+            print(json.dumps(profiling.STARTUP.marks))
+            self.on_close()
+            return
+        problems = self.analyzer.load_errors + self.analyzer.rules_warnings
+        if problems:
+            # Se arranca con lo que se pudo cargar (reglas integradas si falla rules.json), pero avisando
+            print(f"Errores de carga: {'; '.join(problems)}")
+            messagebox.showwarning(self.t("load_errors_title"), self.t("load_errors_msg").format("\n".join(problems)))
+        self.root.after_idle(self._load_banner)
+        self.root.after_idle(self.preload_icons)
+
     def load_hero_icon(self, hero_name, size=(60, 60)):
         if not hero_name or hero_name == self.t("empty_slot"):
             cache_key = ("__PLACEHOLDER__", size)
-            if cache_key in self.image_cache: return self.image_cache[cache_key]
-            tk_image = ImageTk.PhotoImage(Image.new('RGB', size, color='#bdc3c7'))
-            self.image_cache[cache_key] = tk_image
+            tk_image = self.image_cache.get(cache_key)
+            if tk_image is None:
+                # PhotoImage de Tk: el hueco vacío no necesita cargar PIL
+                tk_image = tk.PhotoImage(width=size[0], height=size[1])
+                tk_image.put('#bdc3c7', to=(0, 0, size[0], size[1]))
+                self.image_cache.put(cache_key, tk_image, size[0] * size[1] * 4)
             return tk_image
 
         cache_key = (hero_name, size)
-        if cache_key in self.image_cache: return self.image_cache[cache_key]
-
-        clean_name = "".join(c for c in hero_name if c.isalnum())
-        candidates = [
-            hero_name.replace(":", " ").replace("/", ""),
-            clean_name,
-            hero_name.replace(" ", "-").replace(":", "-"),
-            hero_name.lower()
-        ]
-        
-        found_path = None
-        for c in candidates:
-            path = os.path.join(IMG_DIR, f"{c}{IMG_EXTENSION}")
-            if os.path.exists(path):
-                found_path = path
-                break
-        
-        found_path = found_path or os.path.join(IMG_DIR, f"{candidates[0]}{IMG_EXTENSION}")
+        tk_image = self.image_cache.get(cache_key)
+        if tk_image is not None: return tk_image
+
+        # Si ya se está decodificando en el pool se espera a ese resultado
+        from PIL import Image, ImageTk
+        pil_image = self.icon_loader.take(hero_name, size)
+        if pil_image is None:
+            pil_image = Image.new('RGB', size, color='#7f8c8d')
+        tk_image = ImageTk.PhotoImage(pil_image)
+            
+        self.image_cache.put(cache_key, tk_image, size[0] * size[1] * 4)
+        return tk_image
+
+    def preload_icons(self):
+        # Prioridad: héroes de los roles con huecos vacíos, y dentro de eso por popularidad de baneo
+        slots = list(zip(self.ally_combos, self.ally_vars)) + list(zip(self.enemy_combos, self.enemy_vars))
+        empty_roles = {role for (cb, role), var in slots if not var.get()}
+        order = sorted(self.analyzer.get_sorted_heroes_for_bans(),
+                       key=lambda h: self.analyzer.data[h].get('role') not in empty_roles)
+        self.icon_loader.preload([h for h in order if (h, (40, 40)) not in self.image_cache], [(40, 40)])
+        self._pump_icons()
+
+    def _pump_icons(self):
+        # Sólo la conversión a PhotoImage ocurre en el hilo de Tk, en lotes pequeños
+        from PIL import ImageTk
+        for (hero_name, size), pil_image in self.icon_loader.take_ready(limit=8):
+            if (hero_name, size) not in self.image_cache:
+                self.image_cache.put((hero_name, size), ImageTk.PhotoImage(pil_image), size[0] * size[1] * 4)
+        if self.icon_loader.pending():
+            self.root.after(30, self._pump_icons)
+        else:
+            profiling.STARTUP.mark("icons")
+
+    def _poll_data_files(self):
+        self._reload_pending |= self.watcher.poll()
+        if self._reload_future is None and self._reload_pending:
+            changed, self._reload_pending = self._reload_pending, set()
+            # Cambiar las reglas cambia los scores igual que cambiar data.json
+            data_changed = self.analyzer.data_path in changed or self.analyzer.rules_path in changed
+            bans_changed = self.analyzer.bans_path in changed
+            self._reload_future = self._reload_executor.submit(self.analyzer.reloaded, data_changed, bans_changed)
+            self._reload_changes = (data_changed, bans_changed)
 
+        if self._reload_future is not None and self._reload_future.done():
+            self._finish_reload(self._reload_future, *self._reload_changes)
+            self._reload_future = None
+
+        self.root.after(RELOAD_POLL_MS if self._reload_future is None else 50, self._poll_data_files)
+
+    def _finish_reload(self, future, data_changed, bans_changed):
         try:
-            pil_image = Image.open(found_path).resize(size, Image.Resampling.LANCZOS)
-            tk_image = ImageTk.PhotoImage(pil_image)
+            new_analyzer = future.result()
+            problems = new_analyzer.validate()
         except Exception as e:
-            tk_image = ImageTk.PhotoImage(Image.new('RGB', size, color='#7f8c8d'))
-            
-        self.image_cache[cache_key] = tk_image
-        return tk_image
+            problems = [str(e)]
+        if problems:
+            # Se mantienen los datos anteriores; el siguiente guardado del fichero reintenta
+            print(f"Recarga descartada: {'; '.join(problems[:5])}")
+            return
+
+        # Sustitución atómica en el hilo de Tk: una sola asignación
+        self.analyzer = new_analyzer
+        if data_changed:
+            # Los IDs pueden cambiar: los scores guardados ya no sirven
+            self.lineup.analyzer = new_analyzer
+            self.lineup.reset()
+            self.icon_atlas.hero_names = list(new_analyzer.data.keys())
+            self.schedule_refresh()
+        else:
+            # Sólo cambió la popularidad de baneos: los scores siguen siendo válidos,
+            # salvo en modo esperado (la popularidad pondera los huecos enemigos vacíos)
+            self.lineup.analyzer = new_analyzer
+            if self.lineup.expected:
+                self.lineup.reset()
+                self.schedule_refresh()
+            else:
+                self.schedule_refresh('bans')
+
+    def on_close(self):
+        self.icon_loader.shutdown()
+        self._reload_executor.shutdown(wait=False, cancel_futures=True)
+        self._analysis_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
     def create_menu(self):
         # Menú superior (File, Help, etc.)
@@ -286,6 +1122,7 @@ class App:
         # Usamos self.t() aquí para que salga en el idioma correcto al inicio
         self.menu_bar.add_cascade(label=self.t("menu_help"), menu=self.help_menu)
         self.help_menu.add_command(label=self.t("help_title"), command=self.show_help)
+        self.help_menu.add_command(label=self.t("diag_title"), command=self.show_diagnostics)
 
     def show_help(self):
         # Ventana modal de ayuda
@@ -301,6 +1138,40 @@ class App:
         
         ttk.Button(content_frame, text=self.t("btn_close"), command=help_win.destroy).pack(pady=10)
 
+    def show_diagnostics(self):
+        # Contadores en vivo; los tiempos por función sólo existen con --profile
+        prof = profiling.PROFILER
+        diag_win = tk.Toplevel(self.root)
+        diag_win.title(self.t("diag_title"))
+        diag_win.geometry("640x420")
+
+        content_frame = ttk.Frame(diag_win, padding="10")
+        content_frame.pack(fill="both", expand=True)
+        lbl_stats = ttk.Label(content_frame, text="", font=('Consolas', 9), justify="left")
+        lbl_stats.pack(fill="both", expand=True, anchor="nw")
+
+        def refresh():
+            if not diag_win.winfo_exists(): return
+            rs = self.refresh_stats
+            lines = [self.t("diag_startup").format(profiling.STARTUP.report()),
+                     self.t("diag_refresh").format(rs['writes'], rs['updates'], rs['last_ms'], rs['max_ms']),
+                     self.t("diag_lineup").format(**self.lineup.last_update), ""]
+            lines.append(prof.report() if prof.enabled else self.t("diag_disabled") + "\n\n" + prof.report())
+            lbl_stats.config(text="\n".join(lines))
+            diag_win.after(1000, refresh)
+
+        def dump(kind):
+            path = prof.dump_pstats() if kind == "pstats" else prof.dump_chrome_trace()
+            messagebox.showinfo(self.t("diag_title"), self.t("diag_saved").format(path) if path else self.t("diag_no_cprofile"))
+
+        btn_frame = ttk.Frame(diag_win, padding="5")
+        btn_frame.pack(fill="x")
+        if prof.enabled:
+            ttk.Button(btn_frame, text=self.t("btn_dump_pstats"), command=lambda: dump("pstats")).pack(side="left", padx=5)
+            ttk.Button(btn_frame, text=self.t("btn_dump_trace"), command=lambda: dump("trace")).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text=self.t("btn_close"), command=diag_win.destroy).pack(side="right", padx=5)
+        refresh()
+
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="20")
         main_frame.grid(row=0, column=0, sticky="nsew")
@@ -319,13 +1190,16 @@ class App:
         self.btn_lang.pack(side="right", padx=5)
         self.btn_reset = ttk.Button(top_frame, text="", width=10, command=self.reset_ui)
         self.btn_reset.pack(side="right", padx=5)
+        self.chk_expected = ttk.Checkbutton(top_frame, text="", variable=self.expected_var,
+                                            command=lambda: self.schedule_refresh('allies'))
+        self.chk_expected.pack(side="right", padx=5)
 
         # BANS
         ban_frame = ttk.Frame(main_frame)
         ban_frame.grid(row=1, column=0, columnspan=11)
         for i in range(4):
             var = tk.StringVar(value="")
-            var.trace_add("write", lambda *args: self.update_live_stats())
+            var.trace_add("write", lambda *args: self.schedule_refresh('bans'))
             cb = ttk.Combobox(ban_frame, textvariable=var, width=15, state="readonly")
             cb.pack(side="left", padx=5)
             self.ban_vars.append(var); self.ban_combos.append(cb)
@@ -367,7 +1241,7 @@ class App:
             self.ally_img_labels.append(lbl_img_a)
 
             a_var = tk.StringVar()
-            a_var.trace_add("write", lambda *args: self.update_live_stats())
+            a_var.trace_add("write", lambda *args: self.schedule_refresh('allies'))
             a_cb = ttk.Combobox(main_frame, textvariable=a_var, state="readonly", width=16)
             a_cb.grid(row=r, column=3, pady=4)
             self.ally_vars.append(a_var); self.ally_combos.append((a_cb, role))
@@ -387,7 +1261,7 @@ class App:
             self.enemy_score_labels.append(e_lbl)
 
             e_var = tk.StringVar()
-            e_var.trace_add("write", lambda *args: self.update_live_stats())
+            e_var.trace_add("write", lambda *args: self.schedule_refresh('enemies'))
             e_cb = ttk.Combobox(main_frame, textvariable=e_var, state="readonly", width=16)
             e_cb.grid(row=r, column=8, pady=4)
             self.enemy_vars.append(e_var); self.enemy_combos.append((e_cb, role))
@@ -406,31 +1280,33 @@ class App:
         self.btn_analyze = ttk.Button(main_frame, text="", command=self.run_analysis)
         self.btn_analyze.grid(row=12, column=0, columnspan=11, pady=(25, 15), sticky="ew")
 
-        # --- BANNER INFERIOR ---
+        # --- BANNER INFERIOR --- (se decodifica después de que la ventana sea usable)
+        self.banner_lbl = ttk.Label(main_frame, text="", anchor="center")
+        self.banner_lbl.grid(row=13, column=0, columnspan=11, sticky="ew", pady=10)
+
+    def _load_banner(self):
         banner_path = os.path.join(IMG_DIR, BANNER_FILENAME)
         if os.path.exists(banner_path):
             try:
                 # Carga simple. Para alta calidad, asegurarse que el PNG tenga el tamaño correcto (ej: 900x120)
+                from PIL import Image, ImageTk
                 pil_banner = Image.open(banner_path)
                 self.tk_banner = ImageTk.PhotoImage(pil_banner)
-                
-                banner_lbl = ttk.Label(main_frame, image=self.tk_banner, anchor="center")
-                banner_lbl.grid(row=13, column=0, columnspan=11, sticky="ew", pady=(0, 0))
+                self.banner_lbl.config(image=self.tk_banner)
+                self.banner_lbl.grid_configure(pady=(0, 0))
             except Exception as e:
                 print(f"Error cargando banner: {e}")
-        else:
-            # Espacio vacío si no hay banner
-            ttk.Label(main_frame, text="").grid(row=13, column=0, pady=10)
+        profiling.STARTUP.mark("banner")
 
     def toggle_language(self):
         self.lang = 'en' if self.lang == 'es' else 'es'
         self.apply_language()
-        self.update_live_stats()
 
-    def apply_language(self):
+    def apply_language(self, refresh=True):
         self.root.title(self.t("app_title"))
         self.lbl_bans.config(text=self.t("bans_label"))
         self.btn_reset.config(text=self.t("btn_reset"))
+        self.chk_expected.config(text=self.t("chk_expected"))
         self.btn_lang.config(text=self.lang.upper()) 
         self.lbl_header_ally.config(text=self.t("team_ally"))
         self.lbl_header_enemy.config(text=self.t("team_enemy"))
@@ -446,11 +1322,12 @@ class App:
                 self.menu_bar.entryconfigure(1, label=self.t("menu_help"))
                 # Cambiamos el texto de "Guía" / "Guide" dentro del desplegable (índice 0)
                 self.help_menu.entryconfigure(0, label=self.t("help_title"))
+                self.help_menu.entryconfigure(1, label=self.t("diag_title"))
             except Exception as e:
                 # Fallback por si acaso el índice cambia
                 print(f"Menu update warning: {e}")
 
-        self.update_live_stats()
+        if refresh: self.schedule_refresh()
 
     def reset_ui(self):
         empty_val = self.t("empty_slot")
@@ -458,75 +1335,120 @@ class App:
         for v in self.ally_vars: v.set("")
         for v in self.enemy_vars: v.set("")
         for c in self.ally_checks: c.set(False)
-        self.update_live_stats()
+        self.schedule_refresh()
+
+    def schedule_refresh(self, *parts):
+        # Marca qué partes están sucias y programa una única actualización por frame
+        if self._refreshing: return  # escrituras hechas por la propia actualización
+        self.refresh_stats['writes'] += 1
+        self._dirty.update(parts or DIRTY_ALL)
+        if self._refresh_job is None:
+            if self.refresh_delay_ms > 0:
+                self._refresh_job = self.root.after(self.refresh_delay_ms, self._flush_refresh)
+            else:
+                self._refresh_job = self.root.after_idle(self._flush_refresh)
+
+    def _flush_refresh(self):
+        self._refresh_job = None
+        dirty, self._dirty = self._dirty, set()
+        if not dirty: return
+
+        start = time.perf_counter()
+        self._refreshing = True
+        try:
+            self.update_live_stats(dirty)
+        finally:
+            self._refreshing = False
+
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = self.refresh_stats
+        stats['updates'] += 1
+        stats['last_ms'] = elapsed
+        stats['max_ms'] = max(stats['max_ms'], elapsed)
+        stats['total_ms'] += elapsed
 
     def get_color_and_status(self, score):
         if score >= 1.5: return "#abebc6", "black" # Verde
         elif score <= -2.0: return "#e74c3c", "white" # Rojo
         return "#f9e79f", "black" # Amarillo
 
-    def _update_combo_list(self, combo_list, vars_list, bans, all_sorted):
+    def _update_combo_list(self, combo_list, vars_list, bans):
+        names = [v.get() for v in vars_list]
         for i, (cb, role) in enumerate(combo_list):
-            others = [v.get() for j, v in enumerate(vars_list) if i != j and v.get()]
-            available = [n for n in all_sorted 
-                         if self.analyzer.data[n]['role'] == role and n not in (bans + others)]
-            cb['values'] = sorted(available)
+            excluded = set(bans)
+            excluded.update(n for j, n in enumerate(names) if i != j and n)
+            cb['values'] = self.analyzer.get_available_heroes(role, excluded)
 
-    def update_live_stats(self):
+    def update_live_stats(self, dirty=DIRTY_ALL):
         empty_val = self.t("empty_slot")
         current_bans = [v.get() for v in self.ban_vars if v.get() and v.get() != empty_val]
         allies = [v.get() for v in self.ally_vars] 
         enemies = [v.get() for v in self.enemy_vars]
-        all_sorted = list(self.analyzer.data.keys())
 
         # Update Bans
-        ban_pool = self.analyzer.get_sorted_heroes_for_bans()
-        for i, cb in enumerate(self.ban_combos):
-            others = [v.get() for j, v in enumerate(self.ban_vars) if i != j and v.get() != empty_val]
-            cb['values'] = [empty_val] + [h for h in ban_pool if h not in others]
-            if self.ban_vars[i].get() == "": self.ban_vars[i].set(empty_val)
-
-        # Update Combos
-        self._update_combo_list(self.ally_combos, self.ally_vars, current_bans, all_sorted)
-        self._update_combo_list(self.enemy_combos, self.enemy_vars, current_bans, all_sorted)
+        if 'bans' in dirty:
+            ban_pool = self.analyzer.get_sorted_heroes_for_bans()
+            for i, cb in enumerate(self.ban_combos):
+                others = {v.get() for j, v in enumerate(self.ban_vars) if i != j and v.get() != empty_val}
+                cb['values'] = [empty_val] + [h for h in ban_pool if h not in others]
+                if self.ban_vars[i].get() == "": self.ban_vars[i].set(empty_val)
+
+        # Update Combos (los baneos afectan a las listas de ambos equipos)
+        if 'bans' in dirty or 'allies' in dirty:
+            self._update_combo_list(self.ally_combos, self.ally_vars, current_bans)
+        if 'bans' in dirty or 'enemies' in dirty:
+            self._update_combo_list(self.enemy_combos, self.enemy_vars, current_bans)
+
+        # Modo esperado: los baneos cambian el relleno de los huecos enemigos vacíos
+        rescored = self.lineup.configure(self.expected_var.get(), current_bans)
+        if 'allies' not in dirty and 'enemies' not in dirty and not rescored: return
+
+        # Sólo se re-puntúan los héroes afectados por los huecos que han cambiado
+        self.lineup.sync(allies, enemies)
+        ally_scores = self.lineup.scores['allies']
+        enemy_scores = self.lineup.scores['enemies']
 
         # --- LOGICA DE ACTUALIZACIÓN DE IMÁGENES Y COLORES DE FONDO ---
         
         # 1. Aliados
         for i, var in enumerate(self.ally_vars):
             hero_name = var.get()
-            img = self.load_hero_icon(hero_name, size=(40, 40))
             
             # Calcular color de fondo
             bg_color = "#ecf0f1" # Default gris
             if hero_name and hero_name in self.analyzer.data:
-                score = self.analyzer.calculate_score(hero_name, allies, enemies)
-                bg_color, _ = self.get_color_and_status(score)
+                bg_color, _ = self.get_color_and_status(ally_scores[i])
             
-            self.ally_img_labels[i].config(image=img, bg=bg_color)
+            self.ally_img_labels[i].config(bg=bg_color)
+            if 'allies' in dirty:
+                img = self.load_hero_icon(hero_name, size=(40, 40))
+                self.ally_img_labels[i].config(image=img)
+                self.ally_img_labels[i].image = img  # la caché LRU puede expulsarla
 
         # 2. Enemigos (La puntuación del enemigo se ve desde SU perspectiva o la NUESTRA?)
         # Generalmente queremos ver si el enemigo es peligroso.
         # En la lógica actual, calculate_score evalúa la fuerza del héroe.
         for i, var in enumerate(self.enemy_vars):
             hero_name = var.get()
-            img = self.load_hero_icon(hero_name, size=(40, 40))
             
             bg_color = "#ecf0f1"
             if hero_name and hero_name in self.analyzer.data:
-                # Calculamos el score del enemigo contra NOSOTROS (allies)
-                score = self.analyzer.calculate_score(hero_name, enemies, allies)
-                bg_color, _ = self.get_color_and_status(score)
+                # Score del enemigo contra NOSOTROS (allies), ya calculado en LineupState
+                bg_color, _ = self.get_color_and_status(enemy_scores[i])
                 
-            self.enemy_img_labels[i].config(image=img, bg=bg_color)
+            self.enemy_img_labels[i].config(bg=bg_color)
+            if 'enemies' in dirty:
+                img = self.load_hero_icon(hero_name, size=(40, 40))
+                self.enemy_img_labels[i].config(image=img)
+                self.enemy_img_labels[i].image = img
 
         # Update Text Scores
-        def update_labels(labels, team, opp_team):
+        def update_labels(labels, team, scores):
             total = 0
             for i, name in enumerate(team):
                 lbl = labels[i]
                 if name and name in self.analyzer.data:
-                    score = self.analyzer.calculate_score(name, team, opp_team)
+                    score = scores[i]
                     total += score
                     bg, fg = self.get_color_and_status(score)
                     lbl.config(text=f"{score}", bg=bg, fg=fg)
@@ -534,36 +1456,82 @@ class App:
                     lbl.config(text="-", bg="#ecf0f1", fg="black")
             return total
 
-        total_ally = update_labels(self.ally_score_labels, allies, enemies)
-        total_enemy = update_labels(self.enemy_score_labels, enemies, allies)
+        total_ally = update_labels(self.ally_score_labels, allies, ally_scores)
+        total_enemy = update_labels(self.enemy_score_labels, enemies, enemy_scores)
 
         self.lbl_team_score_ally.config(text=self.t("score_ally").format(round(total_ally, 1)))
         self.lbl_team_score_enemy.config(text=self.t("score_enemy").format(round(total_enemy, 1)))
 
     # --- VENTANA SPOTLIGHT ---
+    # --- CÁLCULO EN SEGUNDO PLANO (spotlight / reporte) ---
+    def _lineup_state(self):
+        # Todo lo que cambia el resultado de un análisis: huecos, baneos, modo, hueco forzado e idioma
+        return (tuple(v.get() for v in self.ally_vars + self.enemy_vars + self.ban_vars + [self.expected_var]),
+                tuple(c.get() for c in self.ally_checks), self.lang)
+
+    def submit_analysis(self, window, work, on_done):
+        # La ventana se abre ya con un aviso; work() corre en el pool y on_done(resultado)
+        # rellena la ventana desde el hilo de Tk
+        placeholder = ttk.Label(window, text=self.t("msg_computing"), font=("Segoe UI", 10, "italic"))
+        placeholder.pack(pady=40)
+        self._analysis_jobs.append({'future': self._analysis_executor.submit(work), 'window': window,
+                                    'placeholder': placeholder, 'on_done': on_done,
+                                    'state': self._lineup_state(), 'analyzer': self.analyzer})
+        if len(self._analysis_jobs) == 1:
+            self.root.after(ANALYSIS_POLL_MS, self._poll_analysis)
+
+    def _poll_analysis(self):
+        state = self._lineup_state()
+        pending = []
+        for job in self._analysis_jobs:
+            future = job['future']
+            if not job['window'].winfo_exists():
+                future.cancel()  # ventana cerrada antes de tener el resultado
+            elif state != job['state'] or self.analyzer is not job['analyzer']:
+                # La alineación (o los datos) cambió mientras se calculaba: el resultado ya no vale
+                future.cancel()
+                job['placeholder'].config(text=self.t("msg_stale"))
+            elif not future.done():
+                pending.append(job)
+            else:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error calculando el análisis: {e}")
+                    job['placeholder'].config(text=self.t("msg_no_rec"))
+                    continue
+                job['placeholder'].destroy()
+                job['on_done'](result)
+        self._analysis_jobs = pending
+        if pending: self.root.after(ANALYSIS_POLL_MS, self._poll_analysis)
+
     def open_spotlight_window(self, index):
         hero_name = self.ally_vars[index].get()
         if not hero_name:
             messagebox.showinfo("Spotlight", self.t("msg_select_slot"))
             return
+        if hero_name not in self.analyzer.data: return
 
         allies = [v.get() for v in self.ally_vars]
         enemies = [v.get() for v in self.enemy_vars]
         empty_val = self.t("empty_slot")
         bans = [v.get() for v in self.ban_vars if v.get() != empty_val]
+        analyzer, lang, expected = self.analyzer, self.lang, self.expected_var.get()
+
+        def work():
+            analysis = analyzer.get_hero_analysis(hero_name, allies, enemies, lang)
+            current_score = analyzer.calculate_score(hero_name, allies, enemies, bans, expected)
+            _, recs, _ = analyzer.get_recommendations(allies, enemies, bans, forced_idx=index, expected=expected)
+            return analysis, current_score, recs
 
-        analysis = self.analyzer.get_hero_analysis(hero_name, allies, enemies, self.lang)
-        if not analysis: return
-        
-        current_score = self.analyzer.calculate_score(hero_name, allies, enemies)
-        bg_color, _ = self.get_color_and_status(current_score)
-        _, recs, _ = self.analyzer.get_recommendations(allies, enemies, bans, forced_idx=index)
-        
-        best_alt_name, best_alt_score = recs[0] if recs else (None, -99)
-        
         spot_win = tk.Toplevel(self.root)
         spot_win.title(self.t("spot_title").format(hero_name))
         spot_win.geometry("500x700")
+        self.submit_analysis(spot_win, work, lambda result: self.fill_spotlight_window(spot_win, hero_name, *result))
+
+    def fill_spotlight_window(self, spot_win, hero_name, analysis, current_score, recs):
+        bg_color, _ = self.get_color_and_status(current_score)
+        best_alt_name, best_alt_score = recs[0] if recs else (None, -99)
 
         visual_frame = tk.Frame(spot_win, bg="#ecf0f1", pady=15)
         visual_frame.pack(fill="x")
@@ -614,6 +1582,12 @@ class App:
 
         ttk.Label(content, text=f"Tags: {', '.join(analysis['archetype'])}", font=("Segoe UI", 9, "italic"), foreground="gray").pack(anchor="w", pady=(5, 10))
 
+        team_view = []
+        if analysis['top_threat']: team_view.append(self.t("lbl_threat").format(*analysis['top_threat']))
+        if analysis['best_counter']: team_view.append(self.t("lbl_best_counter").format(*analysis['best_counter']))
+        if team_view:
+            ttk.Label(content, text=" | ".join(team_view), font=("Segoe UI", 9), foreground="#2c3e50").pack(anchor="w", pady=(0, 10))
+
         for title, items, color in [(self.t("pros"), analysis['pros'] + analysis['synergies'], "#27ae60"), 
                                     (self.t("cons"), analysis['cons'], "#c0392b")]:
             if items:
@@ -636,15 +1610,28 @@ class App:
         empty_val = self.t("empty_slot")
         bans = [v.get() for v in self.ban_vars if v.get() != empty_val]
         forced = next((i for i, v in enumerate(self.ally_checks) if v.get()), None)
-        
-        target, recs, _ = self.analyzer.get_recommendations(allies, enemies, bans, forced)
-        if target: self.show_report(target, recs, enemies, allies)
-        else: messagebox.showinfo("Info", self.t("msg_no_rec"))
+        analyzer, lang, expected = self.analyzer, self.lang, self.expected_var.get()
+
+        def work():
+            target, recs, _ = analyzer.get_recommendations(allies, enemies, bans, forced, expected)
+            if not target or not recs: return target, recs, None, None
+            suggested = recs[0][0]
+            return target, recs, analyzer.generate_argument(suggested, enemies, allies, lang), analyzer.get_tip(suggested, lang)
+
+        def done(result):
+            target, recs, arg_text, tip_text = result
+            if target: self.show_report(res_win, target, recs, enemies, allies, arg_text, tip_text)
+            else:
+                res_win.destroy()
+                messagebox.showinfo("Info", self.t("msg_no_rec"))
 
-    def show_report(self, target, recs, enemies, allies):
         res_win = tk.Toplevel(self.root)
-        res_win.title(self.t("rep_title").format(target))
+        res_win.title(self.t("msg_computing"))
         res_win.geometry("550x750")
+        self.submit_analysis(res_win, work, done)
+
+    def show_report(self, res_win, target, recs, enemies, allies, arg_text, tip_text):
+        res_win.title(self.t("rep_title").format(target))
         cont = ttk.Frame(res_win, padding="25")
         cont.pack(fill="both", expand=True)
 
@@ -684,14 +1671,11 @@ class App:
         ttk.Label(sf, text=stats_text, font=('Segoe UI', 9, 'bold')).pack(anchor="w")
         
         ttk.Label(cont, text=self.t("rep_why"), font=('Segoe UI', 11, 'bold'), foreground="#2c3e50").pack(anchor="w", pady=(10, 5))
-        arg_text = self.analyzer.generate_argument(suggested_hero, enemies, allies, self.lang)
         ttk.Label(cont, text=arg_text, font=('Segoe UI', 10), justify="left").pack(anchor="w")
 
         tf = ttk.Frame(cont, style="Tip.TFrame", padding="10", borderwidth=1, relief="solid")
         tf.pack(fill="x", pady=20)
         ttk.Label(tf, text=self.t("rep_tip_key"), font=('Segoe UI', 9, 'bold')).pack(anchor="w")
-        
-        tip_text = self.analyzer.get_tip(suggested_hero, self.lang)
         ttk.Label(tf, text=tip_text, wraplength=480).pack(anchor="w")
 
         ttk.Separator(cont, orient='horizontal').pack(fill="x", pady=10)
@@ -705,8 +1689,16 @@ class App:
         ttk.Button(res_win, text=self.t("btn_close"), command=res_win.destroy).pack(pady=10)
 
 if __name__ == "__main__":
+    if profiling.requested(sys.argv):
+        profiling.PROFILER.enable(cprofile="--cprofile" in sys.argv)
+        # Rutas calientes actuales: la UI puntúa con LineupState (score_ids por hueco), no por nombres
+        profiling.PROFILER.instrument(Analyzer, ["score_ids", "score_batch", "get_recommendations"])
+        profiling.PROFILER.instrument(LineupState, ["sync"])
+        profiling.PROFILER.instrument(App, ["update_live_stats", "load_hero_icon", "_update_combo_list"])
+
     root = tk.Tk()
     style = ttk.Style()
     style.theme_use('clam') 
     app = App(root)
+    app.startup_report = "--startup-report" in sys.argv
     root.mainloop()
\ No newline at end of file
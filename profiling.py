@@ -0,0 +1,142 @@
+# profiling.py
+# Instrumentación opcional de los caminos calientes (Analyzer / App).
+# Se activa con la variable de entorno OVERWATCHER_PROFILE=1 o con `python main.py --profile`
+# (`--cprofile` además arranca cProfile). Desactivada no envuelve nada: coste cero.
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = "OVERWATCHER_PROFILE"
+MAX_SAMPLES = 4096  # últimas duraciones guardadas por función (para percentiles)
+MAX_TRACE_EVENTS = 200000
+
+
+def requested(argv=()):
+    return os.environ.get(ENV_VAR, "") not in ("", "0") or "--profile" in argv or "--cprofile" in argv
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}  # nombre -> [llamadas, segundos acumulados, deque de duraciones]
+        self.trace = deque(maxlen=MAX_TRACE_EVENTS)
+        self.caches = {}  # nombre -> función que devuelve {'hits', 'misses', ...}
+        self._cprofile = None
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self, cprofile=False):
+        self.enabled = True
+        if cprofile and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def instrument(self, cls, method_names):
+        # Sustituye los métodos de la clase por versiones cronometradas
+        if not self.enabled: return
+        for name in method_names:
+            func = getattr(cls, name)
+            if getattr(func, '_profiled', False): continue
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", func))
+
+    def _wrap(self, label, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(label, start, time.perf_counter())
+        wrapper._profiled = True
+        return wrapper
+
+    def record(self, label, start, end):
+        duration = end - start
+        with self._lock:
+            entry = self.stats.get(label)
+            if entry is None:
+                entry = self.stats[label] = [0, 0.0, deque(maxlen=MAX_SAMPLES)]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2].append(duration)
+            self.trace.append((label, start, duration, threading.get_ident()))
+
+    def register_cache(self, name, stats_fn):
+        self.caches[name] = stats_fn
+
+    def snapshot(self):
+        rows = []
+        with self._lock:
+            items = [(label, count, total, sorted(samples)) for label, (count, total, samples) in self.stats.items()]
+        for label, count, total, samples in items:
+            rows.append({"name": label, "calls": count, "total_ms": total * 1000,
+                         "mean_ms": total / count * 1000 if count else 0.0,
+                         "p50_ms": _percentile(samples, 50) * 1000,
+                         "p95_ms": _percentile(samples, 95) * 1000,
+                         "p99_ms": _percentile(samples, 99) * 1000})
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def cache_snapshot(self):
+        result = {}
+        for name, stats_fn in self.caches.items():
+            stats = stats_fn()
+            lookups = stats.get("hits", 0) + stats.get("misses", 0)
+            result[name] = dict(stats, hit_rate=stats.get("hits", 0) / lookups if lookups else 0.0)
+        return result
+
+    def report(self):
+        lines = [f"{'function':<28}{'calls':>9}{'total ms':>11}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for r in self.snapshot():
+            lines.append(f"{r['name']:<28}{r['calls']:>9}{r['total_ms']:>11.1f}"
+                         f"{r['p50_ms']:>8.2f}{r['p95_ms']:>8.2f}{r['p99_ms']:>8.2f}")
+        lines.append("")
+        for name, stats in self.cache_snapshot().items():
+            lines.append(f"cache {name:<14} hits {stats.get('hits', 0):>7}  misses {stats.get('misses', 0):>7}  "
+                         f"({stats['hit_rate'] * 100:.1f}%)")
+        return "\n".join(lines)
+
+    def dump_pstats(self, path="overwatcher.pstats"):
+        if self._cprofile is None: return None
+        self._cprofile.create_stats()
+        self._cprofile.dump_stats(path)
+        self._cprofile.enable()  # create_stats lo detiene
+        return path
+
+    def dump_chrome_trace(self, path="overwatcher_trace.json"):
+        # Formato "Trace Event" (chrome://tracing, Perfetto): eventos completos en microsegundos
+        with self._lock:
+            events = list(self.trace)
+        pid = os.getpid()
+        trace = [{"name": label, "ph": "X", "ts": (start - self._origin) * 1e6, "dur": duration * 1e6,
+                  "pid": pid, "tid": tid} for label, start, duration, tid in events]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class StartupTimeline:
+    # Hitos del arranque en ms desde que se importa este módulo (lo primero que hace main.py)
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, phase):
+        if phase not in self.marks:
+            self.marks[phase] = (time.perf_counter() - self.origin) * 1000
+
+    def report(self):
+        return " -> ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.marks.items())
+
+
+PROFILER = Profiler()
+STARTUP = StartupTimeline()
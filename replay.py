@@ -0,0 +1,137 @@
+# replay.py
+# Ingesta de logs de partidas (JSONL, uno por cambio de héroe) y línea temporal de scores.
+# Cada línea: {"match": "id", "timestamp": 12.5, "team": "allies"|"enemies", "slot": 0-4, "hero": "Ana"}
+# ("hero" vacío o null = hueco vacío). {"match": "id", "event": "end"} libera el estado de la partida.
+# Todo son generadores: el fichero se lee línea a línea y la memoria no depende de su tamaño.
+# Uso: python replay.py LOG.jsonl[.gz] [--out timeline.csv | --out -] [--max-open 1024]
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from collections import OrderedDict
+
+from main import Analyzer, LineupState, SLOT_ROLES, exit_on_load_errors
+
+MAX_OPEN_MATCHES = 1024  # partidas abiertas a la vez; la más antigua se descarta al superarlo
+CHUNK_ROWS = 4096
+PROGRESS_EVERY = 100000  # eventos entre líneas de progreso
+TEAMS = LineupState.SIDES
+COLUMNS = (["match", "timestamp", "team", "slot", "hero"]
+           + [f"ally_{i + 1}" for i in range(len(SLOT_ROLES))] + [f"enemy_{i + 1}" for i in range(len(SLOT_ROLES))]
+           + ["ally_total", "enemy_total", "diff"])
+
+
+class IngestStats:
+    def __init__(self):
+        self.events = 0
+        self.rows = 0
+        self.errors = 0
+        self.evicted = 0
+        self.start = time.perf_counter()
+
+    def events_per_second(self):
+        return self.events / max(time.perf_counter() - self.start, 1e-9)
+
+
+def read_events(path, stats=None):
+    # Generador de eventos; las líneas mal formadas se cuentan y se saltan
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): continue
+            try:
+                event = json.loads(line)
+                if not isinstance(event, dict): raise ValueError("no es un objeto")
+            except ValueError:
+                if stats: stats.errors += 1
+                continue
+            yield event
+
+
+def timelines(analyzer, events, stats=None, max_open=MAX_OPEN_MATCHES):
+    # Un LineupState por partida abierta: cada cambio sólo re-puntúa los huecos afectados
+    stats = stats or IngestStats()
+    matches = OrderedDict()
+    for event in events:
+        stats.events += 1
+        match_id = event.get("match")
+        if event.get("event") == "end":
+            matches.pop(match_id, None)
+            continue
+
+        team, slot = event.get("team"), event.get("slot")
+        if team not in TEAMS or not isinstance(slot, int) or not 0 <= slot < len(SLOT_ROLES):
+            stats.errors += 1
+            continue
+
+        state = matches.get(match_id)
+        if state is None:
+            state = matches[match_id] = LineupState(analyzer)
+            if len(matches) > max_open:
+                matches.popitem(last=False)
+                stats.evicted += 1
+        else:
+            matches.move_to_end(match_id)
+
+        hero = event.get("hero") or ""
+        state.set_slot(team, slot, hero)
+        allies, enemies = state.scores['allies'], state.scores['enemies']
+        # Totales y diferencia redondeados igual que la UI (la suma de floats arrastra ruido)
+        ally_total, enemy_total = sum(allies), sum(enemies)
+        stats.rows += 1
+        yield ([match_id, event.get("timestamp"), team, slot, hero] + list(allies) + list(enemies)
+               + [round(ally_total, 1), round(enemy_total, 1), round(ally_total - enemy_total, 1)])
+
+
+def columnar_chunks(rows, size=CHUNK_ROWS):
+    # Agrupa las filas en bloques columnares {columna: [valores]} de `size` filas como máximo
+    chunk = [[] for _ in COLUMNS]
+    for row in rows:
+        for column, value in zip(chunk, row): column.append(value)
+        if len(chunk[0]) >= size:
+            yield dict(zip(COLUMNS, chunk))
+            chunk = [[] for _ in COLUMNS]
+    if chunk[0]: yield dict(zip(COLUMNS, chunk))
+
+
+def write_csv(rows, out):
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    writer.writerows(rows)  # consume el generador fila a fila
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Línea temporal de scores a partir de logs de partidas")
+    parser.add_argument("log")
+    parser.add_argument("--out", default="timeline.csv", help="'-' para la salida estándar")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN_MATCHES)
+    args = parser.parse_args()
+
+    analyzer = Analyzer('data.json', 'bans.json')
+    exit_on_load_errors(analyzer)
+    stats = IngestStats()
+
+    def with_progress(events):
+        for event in events:
+            yield event
+            if stats.events % PROGRESS_EVERY == 0:
+                print(f"\r{stats.events} eventos | {stats.events_per_second():.0f} eventos/s",
+                      end="", file=sys.stderr, flush=True)
+
+    rows = timelines(analyzer, with_progress(read_events(args.log, stats)), stats, args.max_open)
+    if args.out == "-":
+        write_csv(rows, sys.stdout)
+    else:
+        with open(args.out, 'w', encoding='utf-8', newline='') as f:
+            write_csv(rows, f)
+
+    elapsed = time.perf_counter() - stats.start
+    print(f"\n{stats.events} eventos -> {stats.rows} filas en {elapsed:.1f} s "
+          f"({stats.events_per_second():.0f} eventos/s) | {stats.errors} errores | "
+          f"{stats.evicted} partidas descartadas", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
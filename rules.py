@@ -0,0 +1,281 @@
+# rules.py
+# Reglas de puntuación declarativas (rules.json) y su compilador.
+# Los grupos de bonus (poke_bonus, flank_bonus, base_bonus, lonely_penalty) sólo dependen de
+# atributos del héroe, así que al cargar se pliegan a una constante por héroe. Con ellas se genera
+# una función de puntuación por héroe sin las ramas que nunca le aplican; el código compilado se
+# reutiliza mientras no cambien los datos ni las reglas.
+# Uso: python rules.py [rules.json]  (equivalencia y tiempos: compilado frente a interpretado;
+# la regresión frente a la puntuación original está en test_rules.py y test_scoring_parity.py)
+import argparse
+import hashlib
+import json
+import operator
+import random
+import sys
+import time
+from collections import OrderedDict
+
+RULES_PATH = "rules.json"
+BONUS_FIELDS = ('poke_bonus', 'flank_bonus', 'base_bonus', 'lonely_penalty')
+TRIGGERS = ('enemy_poke', 'enemy_flankers')
+HERO_ATTRIBUTES = ('name', 'role', 'sub_role', 'poke', 'survivability', 'cc_susceptibility', 'team_dependency', 'health')
+OPERATORS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+             '>': operator.gt, '>=': operator.ge,
+             'in': lambda value, options: value in options, 'not in': lambda value, options: value not in options}
+# Reglas integradas: las de puntuación originales (el rules.json que se distribuye). Se usan si el
+# fichero falta o no es válido, para que los scores no cambien; Analyzer.rules_warnings informa del problema
+DEFAULT_RULES = {
+    "version": 1,
+    "matchup_scale": 1.5,
+    "synergy_scale": 1.0,
+    "flanker_sub_role": "Flanker",
+    "thresholds": {"enemy_poke": 12, "enemy_flankers": 2},
+    "poke_bonus": {"mode": "first", "rules": [
+        {"if": {"sub_role": "Stalwart"}, "bonus": 2.0},
+        {"if": {"poke": {">=": 4}}, "bonus": 1.5},
+        {"if": {"role": "Damage", "poke": {"<": 2}, "sub_role": {"!=": "Flanker"}}, "bonus": -1.5}]},
+    "flank_bonus": {"mode": "sum", "rules": [
+        {"if": {"role": "Support", "sub_role": ["Survivor", "Tactician"]}, "bonus": 2.0},
+        {"if": {"role": "Support", "sub_role": "Medic", "survivability": {"<": 3}}, "bonus": -2.0},
+        {"if": {"cc_susceptibility": {"<": 3}, "sub_role": ["Specialist", "Bruiser"]}, "bonus": 1.0}]},
+    "base_bonus": {"mode": "sum", "rules": [
+        {"if": {"sub_role": ["Sharpshooter", "Stalwart"]}, "bonus": 0.5}]},
+    "lonely_penalty": {"mode": "sum", "rules": [
+        {"if": {"team_dependency": {">=": 4}}, "bonus": -1}]},
+    "arguments": [
+        {"when": "enemy_poke", "if": {"any": [{"poke": {">=": 4}}, {"sub_role": "Stalwart"}]}, "text": "arg_poke_res"},
+        {"when": "enemy_flankers", "if": {"sub_role": ["Survivor", "Bruiser"]}, "text": "arg_anti_dive"}],
+}
+MAX_COMPILED = 8  # versiones de código generado que se conservan
+
+_compiled = OrderedDict()  # sha256 del código fuente -> code object
+
+
+# --- CARGA Y VALIDACIÓN ---
+def load_rules(path=RULES_PATH):
+    # Devuelve (reglas, problemas); con problemas se usan DEFAULT_RULES
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+    except OSError:
+        return DEFAULT_RULES, [f"{path}: no encontrado"]
+    except ValueError:
+        return DEFAULT_RULES, [f"{path}: JSON inválido"]
+    problems = [f"{path}: {p}" for p in validate(rules)]
+    return (DEFAULT_RULES, problems) if problems else (rules, [])
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_condition(condition, where, problems):
+    if not isinstance(condition, dict):
+        problems.append(f"{where}: la condición debe ser un objeto")
+        return
+    for attr, test in condition.items():
+        if attr == 'any':
+            if not isinstance(test, list) or not test:
+                problems.append(f"{where}.any: debe ser una lista no vacía")
+                continue
+            for i, sub in enumerate(test): _check_condition(sub, f"{where}.any[{i}]", problems)
+        elif attr not in HERO_ATTRIBUTES:
+            problems.append(f"{where}: atributo desconocido {attr!r}")
+        elif isinstance(test, dict):
+            for op in test:
+                if op not in OPERATORS: problems.append(f"{where}.{attr}: operador desconocido {op!r}")
+
+
+def _check_group(group, field, problems):
+    if not isinstance(group, dict) or group.get('mode', 'sum') not in ('first', 'sum'):
+        problems.append(f"{field}: mode debe ser 'first' o 'sum'")
+        return
+    for i, rule in enumerate(group.get('rules', [])):
+        where = f"{field}.rules[{i}]"
+        if not isinstance(rule, dict) or not _is_number(rule.get('bonus')):
+            problems.append(f"{where}: bonus no numérico")
+            continue
+        _check_condition(rule.get('if', {}), where, problems)
+        # La poda de optimize_composition supone que estar sin sinergias nunca suma
+        if field == 'lonely_penalty' and rule['bonus'] > 0:
+            problems.append(f"{where}: lonely_penalty no puede ser positivo")
+
+
+def validate(rules):
+    problems = []
+    if not isinstance(rules, dict): return ["el fichero debe contener un objeto"]
+    if not _is_number(rules.get('matchup_scale')): problems.append("matchup_scale no numérico")
+    if not _is_number(rules.get('synergy_scale', 1.0)): problems.append("synergy_scale no numérico")
+    if not isinstance(rules.get('flanker_sub_role'), str): problems.append("flanker_sub_role debe ser texto")
+    thresholds = rules.get('thresholds')
+    if not isinstance(thresholds, dict) or not all(_is_number(thresholds.get(t)) for t in TRIGGERS):
+        problems.append(f"thresholds debe definir {', '.join(TRIGGERS)}")
+    for field in BONUS_FIELDS:
+        if field in rules: _check_group(rules[field], field, problems)
+    for i, arg in enumerate(rules.get('arguments', [])):
+        where = f"arguments[{i}]"
+        if not isinstance(arg, dict) or arg.get('when') not in TRIGGERS or not isinstance(arg.get('text'), str):
+            problems.append(f"{where}: necesita 'when' ({', '.join(TRIGGERS)}) y 'text'")
+            continue
+        _check_condition(arg.get('if', {}), where, problems)
+    return problems
+
+
+# --- EVALUACIÓN INTERPRETADA ---
+def matches(condition, profile):
+    # Condición sobre los atributos de un HeroProfile: valor (igualdad), lista (pertenencia),
+    # {operador: operando} o {"any": [condiciones]}; todas las claves deben cumplirse
+    for attr, test in condition.items():
+        if attr == 'any':
+            if not any(matches(sub, profile) for sub in test): return False
+            continue
+        value = getattr(profile, attr)
+        if isinstance(test, dict):
+            if not all(OPERATORS[op](value, operand) for op, operand in test.items()): return False
+        elif isinstance(test, list):
+            if value not in test: return False
+        elif value != test:
+            return False
+    return True
+
+
+def group_bonus(group, profile):
+    # 'first': la primera regla que se cumple; 'sum': suma de todas las que se cumplen
+    total = 0
+    for rule in group.get('rules', ()):
+        if matches(rule.get('if', {}), profile):
+            if group.get('mode') == 'first': return rule['bonus']
+            total += rule['bonus']
+    return total
+
+
+def fold(rules, profiles):
+    # Plegado de constantes: cada grupo se resuelve una vez por héroe
+    folded = {field: [group_bonus(rules.get(field, {}), p) for p in profiles] for field in BONUS_FIELDS}
+    folded['arguments'] = [tuple((arg['when'], arg['text']) for arg in rules.get('arguments', ())
+                                 if matches(arg.get('if', {}), p)) for p in profiles]
+    return folded
+
+
+def interpreted_score(rules, tables, profile, ally_ids, enemy_ids):
+    # Referencia: evalúa las reglas del fichero en cada llamada (mismo orden de sumas que el código generado)
+    h = profile.id
+    enemy_poke, enemy_flankers = tables.get_comp_stats_ids(enemy_ids)
+    score = 0
+    for e in enemy_ids: score += tables.matchup[h][e]
+    has_synergy = False
+    for a in ally_ids:
+        if a in tables.synergy_sets[h]:
+            score += tables.synergy[h][a]
+            has_synergy = True
+    thresholds = rules['thresholds']
+    if enemy_poke >= thresholds['enemy_poke']: score += group_bonus(rules.get('poke_bonus', {}), profile)
+    if enemy_flankers >= thresholds['enemy_flankers']: score += group_bonus(rules.get('flank_bonus', {}), profile)
+    score += group_bonus(rules.get('base_bonus', {}), profile)
+    if not has_synergy: score += group_bonus(rules.get('lonely_penalty', {}), profile)
+    return round(score, 1)
+
+
+# --- GENERACIÓN DE CÓDIGO ---
+def generate_source(tables):
+    # Una función por héroe. Necesita de `tables`: matchup, synergy, synergy_sets, los vectores
+    # de BONUS_FIELDS y poke_threshold / flank_threshold (Analyzer o simulate.SharedTables)
+    lines = []
+    for h in range(len(tables.matchup)):
+        lines.append(f"def _score_{h}(ally_ids, enemy_ids, enemy_poke, enemy_flankers, "
+                     f"_m=_rows[{h}].__getitem__, _s=_syn[{h}].__getitem__, _set=_sets[{h}]):")
+        # sum(map(...), inicio) suma de izquierda a derecha: mismo orden que el bucle interpretado.
+        # Fuera de synergy_sets la fila de sinergia vale 0, así que no hace falta filtrar.
+        expr = "sum(map(_m, enemy_ids), 0)" if any(tables.matchup[h]) else "0"
+        if tables.synergy_sets[h]: expr = f"sum(map(_s, ally_ids), {expr})"
+        lines.append(f"    score = {expr}")
+        if tables.poke_bonus[h]:
+            lines.append(f"    if enemy_poke >= {tables.poke_threshold!r}: score += {tables.poke_bonus[h]!r}")
+        if tables.flank_bonus[h]:
+            lines.append(f"    if enemy_flankers >= {tables.flank_threshold!r}: score += {tables.flank_bonus[h]!r}")
+        if tables.base_bonus[h]:
+            lines.append(f"    score += {tables.base_bonus[h]!r}")
+        if tables.lonely_penalty[h]:
+            lines.append(f"    if _set.isdisjoint(ally_ids): score += {tables.lonely_penalty[h]!r}")
+        lines.append("    return round(score, 1)")
+        lines.append("")
+    lines.append("SCORERS = [" + ", ".join(f"_score_{h}" for h in range(len(tables.matchup))) + "]")
+    return "\n".join(lines) + "\n"
+
+
+def build_scorers(tables):
+    # Lista de funciones f(ally_ids, enemy_ids, enemy_poke, enemy_flankers) por ID de héroe
+    source = generate_source(tables)
+    key = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    code = _compiled.get(key)
+    if code is None:
+        code = compile(source, "<rules>", "exec")
+        _compiled[key] = code
+        while len(_compiled) > MAX_COMPILED: _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(key)
+    namespace = {'_rows': tables.matchup, '_syn': tables.synergy, '_sets': tables.synergy_sets}
+    exec(code, namespace)
+    return namespace['SCORERS']
+
+
+def dropped_branches(tables):
+    # Ramas de regla eliminadas del código generado (bonus plegados a 0), por grupo
+    return {field: sum(1 for value in getattr(tables, field) if not value) for field in BONUS_FIELDS}
+
+
+# --- COMPROBACIÓN ---
+def random_queries(analyzer, count, seed=0):
+    rnd = random.Random(seed)
+    n = len(analyzer.hero_names)
+    queries = []
+    for _ in range(count):
+        team = rnd.sample(range(n), rnd.randint(1, 5))
+        queries.append((team[0], team[1:], rnd.sample(range(n), rnd.randint(0, 5))))
+    return queries
+
+
+def check_equivalence(analyzer, queries):
+    # [(héroe, aliados, enemigos, compilado, interpretado)] donde no coinciden
+    mismatches = []
+    for h, ally_ids, enemy_ids in queries:
+        compiled = analyzer.score_ids(h, ally_ids, enemy_ids)
+        reference = interpreted_score(analyzer.rules, analyzer, analyzer.profiles[h], ally_ids, enemy_ids)
+        if compiled != reference: mismatches.append((h, ally_ids, enemy_ids, compiled, reference))
+    return mismatches
+
+
+def main():
+    from main import Analyzer, exit_on_load_errors  # main importa este módulo
+
+    parser = argparse.ArgumentParser(description="Comprueba las reglas compiladas frente a las interpretadas")
+    parser.add_argument("rules", nargs="?", default=RULES_PATH)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    analyzer = Analyzer('data.json', 'bans.json', rules_path=args.rules)
+    exit_on_load_errors(analyzer)
+    if analyzer.rules_warnings:
+        # Aquí el fichero de reglas es justo lo que se comprueba: las integradas no sirven
+        print("Error: " + "; ".join(analyzer.rules_warnings), file=sys.stderr)
+        raise SystemExit(1)
+    queries = random_queries(analyzer, args.samples)
+    mismatches = check_equivalence(analyzer, queries)
+    for h, ally_ids, enemy_ids, compiled, reference in mismatches[:10]:
+        print(f"{analyzer.hero_names[h]} aliados={ally_ids} enemigos={enemy_ids}: {compiled} != {reference}")
+
+    timings = {}
+    for label, score in (("interpretado", lambda h, a, e: interpreted_score(analyzer.rules, analyzer, analyzer.profiles[h], a, e)),
+                         ("compilado", analyzer.score_ids)):
+        start = time.perf_counter()
+        for h, ally_ids, enemy_ids in queries: score(h, ally_ids, enemy_ids)
+        timings[label] = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"{len(queries)} consultas, {len(mismatches)} diferencias | "
+          + " | ".join(f"{label} {us:.2f} us/score" for label, us in timings.items()))
+    print("ramas eliminadas: " + ", ".join(f"{field} {count}/{len(analyzer.hero_names)}"
+                                           for field, count in dropped_branches(analyzer).items()))
+    if mismatches: raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
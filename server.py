@@ -0,0 +1,255 @@
+# server.py
+# Servidor HTTP/JSON sin interfaz gráfica para overlays y bots.
+# Uso: python server.py [--host 127.0.0.1] [--port 8765] [--workers 8] [--max-connections 256]
+#
+# Endpoints (POST, cuerpo JSON):
+#   /score            {"hero", "allies", "enemies", "bans", "expected"}
+#   /recommendations  {"allies", "enemies", "bans", "forced_idx", "expected"}
+#                     (expected=true: los huecos enemigos vacíos cuentan con su valor esperado)
+#   /analysis         {"hero", "allies", "enemies", "lang"}
+#   /counters         {"enemies", "allies", "bans", "role", "k"}  (mejor counter y amenazas)
+#   /swaps            {"allies", "enemies", "bans", "k"}  (mejores cambios en cualquier hueco)
+#   /draft            {"allies", "enemies", "bans", "budget_ms"}  (siguiente baneo/pick por búsqueda minimax)
+#   /score_batch      {"allies": [[...5]], "enemies": [[...5]]}  (nombres o IDs, -1/"" = vacío)
+#   /batch            {"requests": [{"method": "score", "params": {...}}, ...]}
+# GET /health devuelve el número de héroes cargados.
+import argparse
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from draft import DraftEngine, DEFAULT_BUDGET_MS
+from main import Analyzer, exit_on_load_errors
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_DRAFT_BUDGET_MS = 2000  # la búsqueda ocupa un hueco de cálculo durante todo el presupuesto
+KEEPALIVE_TIMEOUT = 15  # s sin peticiones antes de cerrar una conexión
+MAX_CONNECTIONS = 256  # conexiones abiertas a la vez; por encima se responde 503
+
+
+def _ids_matrix(analyzer, rows):
+    # Acepta filas de nombres ("" = vacío) o de IDs enteros (-1 = vacío), sin mezclar
+    n = len(analyzer.hero_names)
+    matrix = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, list):
+            raise ValueError(f"fila {i}: debe ser una lista")
+        if all(isinstance(h, str) for h in row):
+            matrix.append(analyzer.to_slot_ids(row))
+        elif all(type(h) is int and -1 <= h < n for h in row):
+            matrix.append(row)
+        else:
+            raise ValueError(f"fila {i}: se esperan sólo nombres o sólo IDs entre -1 y {n - 1}")
+    return matrix
+
+
+def _k_param(analyzer, params):
+    k = int(params.get("k", 3))
+    if not 1 <= k <= len(analyzer.hero_names):
+        raise ValueError(f"k debe estar entre 1 y {len(analyzer.hero_names)}")
+    return k
+
+
+def handle_score(analyzer, params):
+    return {"score": analyzer.calculate_score(params.get("hero"), params.get("allies", []), params.get("enemies", []),
+                                              params.get("bans", []), bool(params.get("expected", False)))}
+
+
+def handle_recommendations(analyzer, params):
+    target, candidates, scores = analyzer.get_recommendations(
+        list(params.get("allies", [])), params.get("enemies", []), params.get("bans", []), params.get("forced_idx"),
+        bool(params.get("expected", False)))
+    return {"target": target, "candidates": candidates, "scores": scores}
+
+
+def handle_analysis(analyzer, params):
+    return {"analysis": analyzer.get_hero_analysis(params.get("hero"), params.get("allies", []),
+                                                   params.get("enemies", []), params.get("lang", "en"))}
+
+
+def handle_counters(analyzer, params):
+    allies = params.get("allies", [])
+    best = analyzer.best_counters(params.get("enemies", []), list(params.get("bans", [])) + list(allies),
+                                  params.get("role"), _k_param(analyzer, params))
+    return {"best_counters": [{"hero": h, "score": s} for h, s in best],
+            "threats": [{"hero": h, "score": s} for h, s in analyzer.threat_ranking(params.get("enemies", []), allies)]}
+
+
+def handle_swaps(analyzer, params):
+    swaps = analyzer.get_swap_gains(list(params.get("allies", [])), params.get("enemies", []),
+                                    params.get("bans", []), _k_param(analyzer, params))
+    return {"swaps": [{"slot": slot, "hero": hero, "delta": delta} for slot, hero, delta in swaps]}
+
+
+def handle_draft(analyzer, params):
+    # Un motor por petición: la tabla de transposiciones no se comparte entre hilos
+    budget = float(params.get("budget_ms", DEFAULT_BUDGET_MS))
+    if not math.isfinite(budget) or budget <= 0:
+        raise ValueError("budget_ms debe ser un número positivo")
+    budget = min(budget, MAX_DRAFT_BUDGET_MS)
+    result = DraftEngine(analyzer).search(params.get("allies", []), params.get("enemies", []),
+                                          params.get("bans", []), budget)
+    action = result["action"]
+    return {"action": dict(zip(("kind", "side", "hero"), action)) if action else None,
+            "value": result["value"], "depth": result["depth"], "nodes": result["nodes"],
+            "pv": [dict(zip(("kind", "side", "hero"), step)) for step in result["pv"]]}
+
+
+def handle_score_batch(analyzer, params):
+    allies, enemies = analyzer.score_batch(_ids_matrix(analyzer, params.get("allies", [])),
+                                           _ids_matrix(analyzer, params.get("enemies", [])))
+    return {"allies": allies, "enemies": enemies}
+
+
+HANDLERS = {
+    "score": handle_score,
+    "recommendations": handle_recommendations,
+    "analysis": handle_analysis,
+    "counters": handle_counters,
+    "swaps": handle_swaps,
+    "draft": handle_draft,
+    "score_batch": handle_score_batch,
+}
+
+
+def handle_batch(analyzer, params):
+    # Varias peticiones en un único viaje; un error sólo afecta a su propia entrada
+    results = []
+    for req in params.get("requests", []):
+        try:
+            if not isinstance(req, dict): raise ValueError("cada petición debe ser un objeto JSON")
+            handler = HANDLERS.get(req.get("method"))
+            if handler is None: raise ValueError(f"método desconocido: {req.get('method')}")
+            results.append(handler(analyzer, req.get("params", {})))
+        except (TypeError, ValueError, KeyError, IndexError, AttributeError) as e:
+            results.append({"error": str(e)})
+    return {"results": results}
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantiene la conexión abierta entre peticiones (keep-alive)
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en escrituras separadas
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "heroes": len(self.server.analyzer.hero_names)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0: raise ValueError
+        except ValueError:
+            # Sin longitud válida no se sabe dónde acaba el cuerpo: la conexión no se puede reutilizar
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "request too large"})
+            return
+        raw = self.rfile.read(length)
+
+        name = self.path.strip("/")
+        handler = handle_batch if name == "batch" else HANDLERS.get(name)
+        if handler is None:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            params = json.loads(raw.decode('utf-8') or "{}")
+            if not isinstance(params, dict): raise ValueError("el cuerpo debe ser un objeto JSON")
+            with self.server.slots:  # como mucho `workers` peticiones calculándose a la vez
+                result = handler(self.server.analyzer, params)
+        except (TypeError, ValueError, KeyError, IndexError, AttributeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(200, result)
+
+
+class PooledHTTPServer(HTTPServer):
+    # Cada conexión tiene su propio hilo: una conexión keep-alive inactiva no ocupa ninguno de
+    # los `workers` huecos de cálculo, que sólo se toman mientras se atiende una petición.
+    # El Analyzer es compartido y sólo se lee (sus cachés internas toleran accesos concurrentes)
+    request_queue_size = 128  # cola de listen(): con 5 (por defecto) las ráfagas de conexiones se rechazan
+
+    def __init__(self, address, analyzer, workers=8, verbose=False, max_connections=MAX_CONNECTIONS):
+        super().__init__(address, ScoringHandler)
+        self.analyzer = analyzer
+        self.verbose = verbose
+        self.slots = threading.BoundedSemaphore(workers)
+        self.max_connections = max_connections
+        self.connections = 0
+        self._connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            accepted = self.connections < self.max_connections
+            if accepted: self.connections += 1
+        if not accepted:
+            self._reject(request)
+            return
+        threading.Thread(target=self._process, args=(request, client_address), daemon=True,
+                         name=f"http-conn-{client_address[1]}").start()
+
+    def _reject(self, request):
+        body = json.dumps({"error": "too many connections"}).encode('utf-8')
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json; charset=utf-8\r\n"
+                            b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._connections_lock:
+                self.connections -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor headless del Analyzer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="peticiones calculándose a la vez")
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS)
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--bans", default="bans.json")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    analyzer = Analyzer(args.data, args.bans)
+    exit_on_load_errors(analyzer)
+    server = PooledHTTPServer((args.host, args.port), analyzer, args.workers, args.verbose, args.max_connections)
+    print(f"Sirviendo en http://{args.host}:{server.server_address[1]} ({args.workers} hilos)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# simulate.py
+# Informe de meta: para cada héroe, su calculate_score esperado contra todas las
+# composiciones enemigas 1-2-2 posibles del roster (el héroe se puntúa solo, sin aliados).
+# El espacio se reparte en shards entre procesos; las tablas compiladas del Analyzer
+# se comparten por memoria compartida en lugar de enviarse a cada worker.
+# Uso: python simulate.py [--workers N] [--out meta_report.csv] [--checkpoint meta_checkpoint.json]
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from multiprocessing import shared_memory
+
+import datapack
+import rules
+from main import Analyzer, ROLES, exit_on_load_errors
+
+CHECKPOINT_EVERY = 10  # shards completados entre escrituras del checkpoint
+# Vectores por héroe que necesita score_ids, en el orden en que se copian a memoria compartida
+SHARED_VECTORS = ('role_vec', 'poke_vec', 'sub_role_vec') + rules.BONUS_FIELDS
+
+
+def pack_tables(analyzer):
+    # Copia las tablas compiladas a un bloque de memoria compartida (doubles)
+    n = len(analyzer.hero_names)
+    values = []
+    for name in SHARED_VECTORS:
+        values.extend(getattr(analyzer, name))
+    for table in (analyzer.matchup, analyzer.synergy):
+        for row in table: values.extend(row)
+    for h in range(n):
+        values.extend(1.0 if a in analyzer.synergy_sets[h] else 0.0 for a in range(n))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(8, len(values) * 8))
+    view = shm.buf.cast('d')
+    for i, v in enumerate(values): view[i] = v
+    view.release()
+    return shm
+
+
+class SharedTables:
+    # Vista de sólo lectura sobre el bloque compartido con los mismos atributos que
+    # usa Analyzer.score_ids, para puntuar con exactamente las mismas reglas
+    score_ids = Analyzer.score_ids
+    get_comp_stats_ids = Analyzer.get_comp_stats_ids
+
+    def __init__(self, buf, n, flanker_id, thresholds):
+        view = buf.cast('d')
+        self._view = view
+        offset = 0
+        for name in SHARED_VECTORS:
+            setattr(self, name, [int(x) if name in ('role_vec', 'sub_role_vec') else x for x in view[offset:offset + n]])
+            offset += n
+        self.matchup = [view[offset + h * n:offset + (h + 1) * n] for h in range(n)]
+        offset += n * n
+        self.synergy = [view[offset + h * n:offset + (h + 1) * n] for h in range(n)]
+        offset += n * n
+        self.synergy_sets = [frozenset(a for a in range(n) if view[offset + h * n + a]) for h in range(n)]
+        self.flanker_id = flanker_id
+        self.poke_threshold, self.flank_threshold = thresholds
+        self.n = n
+        # Mismo código generado que el Analyzer (rules.build_scorers) sobre las vistas compartidas
+        self.scorers = rules.build_scorers(self)
+
+
+_worker = {}
+
+
+def _attach(shm_name, n, flanker_id, thresholds):
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        # Python < 3.13: los workers comparten el resource tracker del proceso principal,
+        # que es quien hace unlink al terminar
+        shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['shm'] = shm
+    _worker['tables'] = SharedTables(shm.buf, n, flanker_id, thresholds)
+
+
+def role_pools(tables_or_analyzer, n):
+    role_vec = tables_or_analyzer.role_vec
+    return {role: [h for h in range(n) if role_vec[h] == ROLES.index(role)] for role in ROLES}
+
+
+def make_shards(analyzer):
+    # Un shard = (tanque, primer Damage); dentro se recorren el segundo Damage y los Support
+    pools = role_pools(analyzer, len(analyzer.hero_names))
+    return [(t, d) for t in range(len(pools["Tank"])) for d in range(len(pools["Damage"]) - 1)]
+
+
+def _run_shard(shard):
+    tables = _worker['tables']
+    n = tables.n
+    pools = role_pools(tables, n)
+    tank = pools["Tank"][shard[0]]
+    damage = pools["Damage"]
+    d1 = damage[shard[1]]
+
+    # Histograma por héroe en décimas de punto: percentiles exactos con memoria constante
+    hist = [{} for _ in range(n)]
+    comps = 0
+    for d2 in damage[shard[1] + 1:]:
+        for s1, s2 in combinations(pools["Support"], 2):
+            enemies = [tank, d1, d2, s1, s2]
+            comp = tables.get_comp_stats_ids(enemies)
+            comps += 1
+            for h in range(n):
+                key = int(round(tables.score_ids(h, [], enemies, comp) * 10))
+                hist[h][key] = hist[h].get(key, 0) + 1
+    return shard, comps, hist
+
+
+def _percentile(hist, total, pct):
+    target = pct / 100 * (total - 1)
+    seen = 0
+    for key in sorted(hist):
+        seen += hist[key]
+        if seen > target: return key / 10
+    return 0.0
+
+
+def summarize(analyzer, hists):
+    rows = []
+    for h, name in enumerate(analyzer.hero_names):
+        hist = hists[h]
+        total = sum(hist.values())
+        if not total: continue
+        rows.append({
+            "hero": name,
+            "role": ROLES[analyzer.role_vec[h]],
+            "comps": total,
+            "mean": round(sum(k * c for k, c in hist.items()) / 10 / total, 3),
+            "p10": _percentile(hist, total, 10),
+            "p50": _percentile(hist, total, 50),
+            "p90": _percentile(hist, total, 90),
+            "min": min(hist) / 10,
+            "max": max(hist) / 10,
+            "favorable": sum(c for k, c in hist.items() if k > 0),
+            "unfavorable": sum(c for k, c in hist.items() if k < 0),
+        })
+    rows.sort(key=lambda r: r["mean"], reverse=True)
+    return rows
+
+
+def _load_checkpoint(path, data_hash):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            ckpt = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if ckpt.get("data_hash") != data_hash: return None
+    hists = [{int(k): v for k, v in hist.items()} for hist in ckpt["hists"]]
+    return {tuple(s) for s in ckpt["done"]}, ckpt["comps"], hists
+
+
+def _save_checkpoint(path, data_hash, done, comps, hists):
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"data_hash": data_hash, "done": sorted(done), "comps": comps, "hists": hists}, f)
+    os.replace(tmp, path)  # nunca queda un checkpoint a medio escribir
+
+
+def run_simulation(analyzer, out_path="meta_report.csv", checkpoint_path="meta_checkpoint.json",
+                   workers=None, progress=None):
+    # progress(shards_hechos, shards_totales, composiciones) se llama tras cada shard
+    n = len(analyzer.hero_names)
+    # Las reglas también cambian los scores: el checkpoint sólo vale con los mismos datos y reglas
+    rules_hash = hashlib.sha256(json.dumps(analyzer.rules, sort_keys=True).encode('utf-8')).hexdigest()
+    data_hash = datapack.source_hash(analyzer.data_path).hex() + rules_hash[:16]
+    shards = make_shards(analyzer)
+
+    done, comps, hists = set(), 0, [{} for _ in range(n)]
+    if checkpoint_path:
+        ckpt = _load_checkpoint(checkpoint_path, data_hash)
+        if ckpt: done, comps, hists = ckpt
+    todo = [s for s in shards if s not in done]
+
+    shm = pack_tables(analyzer)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, n, analyzer.flanker_id,
+                                           (analyzer.poke_threshold, analyzer.flank_threshold))) as pool:
+            futures = [pool.submit(_run_shard, s) for s in todo]
+            for i, future in enumerate(as_completed(futures), 1):
+                shard, shard_comps, shard_hist = future.result()
+                for h in range(n):
+                    for key, count in shard_hist[h].items():
+                        hists[h][key] = hists[h].get(key, 0) + count
+                comps += shard_comps
+                done.add(shard)
+                if checkpoint_path and (i % CHECKPOINT_EVERY == 0 or i == len(futures)):
+                    _save_checkpoint(checkpoint_path, data_hash, done, comps, hists)
+                if progress: progress(len(done), len(shards), comps)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    rows = summarize(analyzer, hists)
+    if out_path:
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["hero"])
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de meta sobre todas las composiciones enemigas")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="meta_report.csv")
+    parser.add_argument("--checkpoint", default="meta_checkpoint.json")
+    args = parser.parse_args()
+
+    analyzer = Analyzer('data.json', 'bans.json')
+    exit_on_load_errors(analyzer)
+    start = time.perf_counter()
+
+    def progress(done, total, comps):
+        elapsed = time.perf_counter() - start
+        print(f"\r{done}/{total} shards | {comps} comps | {comps / max(elapsed, 1e-9):.0f} comps/s", end="", flush=True)
+
+    rows = run_simulation(analyzer, args.out, args.checkpoint, args.workers, progress)
+    print(f"\n{len(rows)} héroes -> {args.out} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# test_reload.py
+# Recarga en caliente: cambiar sólo bans.json reutiliza las tablas compiladas y los scorers de la
+# instancia actual, pero la popularidad nueva se nota en el orden de baneos y en el modo esperado.
+# Uso: python -m pytest -q
+import json
+import os
+
+from main import Analyzer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(HERE, "data.json")
+BANS_PATH = os.path.join(HERE, "bans.json")
+RULES_PATH = os.path.join(HERE, "rules.json")
+
+ALLIES = ["Reinhardt", "Tracer", "Genji", "Ana", "Lucio"]
+ENEMIES = ["Sigma", "", "", "Zenyatta", ""]
+
+
+def write_bans(path, popularity):
+    path.write_text(json.dumps({"popularity": popularity}), encoding='utf-8')
+
+
+def expected_scores(analyzer):
+    return [analyzer.calculate_score(h, ALLIES, ENEMIES, expected=True) for h in ALLIES]
+
+
+def test_bans_only_reload_reuses_compiled_tables(tmp_path):
+    bans_path = tmp_path / "bans.json"
+    with open(BANS_PATH, 'r', encoding='utf-8') as f:
+        popularity = json.load(f).get('popularity', {})
+    write_bans(bans_path, popularity)
+    analyzer = Analyzer(DATA_PATH, str(bans_path), rules_path=RULES_PATH)
+    old_pool, old_expected = analyzer.get_sorted_heroes_for_bans(), expected_scores(analyzer)
+
+    # La popularidad se invierte: cambian el orden de baneos y los huecos enemigos esperados
+    top = max(popularity.values()) + 1
+    write_bans(bans_path, {name: top - popularity.get(name, 0) for name in analyzer.hero_names})
+    new = analyzer.reloaded(data_changed=False, bans_changed=True)
+
+    assert new.validate() == []
+    assert new.scorers is analyzer.scorers and new.matchup is analyzer.matchup and new.data is analyzer.data
+    fresh = Analyzer(DATA_PATH, str(bans_path), rules_path=RULES_PATH)
+    assert new.get_sorted_heroes_for_bans() == fresh.get_sorted_heroes_for_bans() != old_pool
+    assert expected_scores(new) == expected_scores(fresh) != old_expected
+    # La instancia anterior no cambia: quien la siga usando no ve la recarga a medias
+    assert analyzer.get_sorted_heroes_for_bans() == old_pool and expected_scores(analyzer) == old_expected
@@ -0,0 +1,96 @@
+# test_rules.py
+# Regresión de rules.json frente a la puntuación original: scores fijos (calculados con la
+# implementación anterior a rules.json) para alineaciones que disparan todas las reglas, reglas
+# integradas (con aviso, sin rechazar la carga) cuando el fichero falta o no es válido, y código
+# generado frente a interpretado.
+# Si se recalibran los pesos (calibrate.py) a propósito, hay que actualizar GOLDEN.
+# Uso: python -m pytest -q
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import rules
+from main import Analyzer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(HERE, "data.json")
+BANS_PATH = os.path.join(HERE, "bans.json")
+RULES_PATH = os.path.join(HERE, "rules.json")
+
+# (aliados, enemigos, scores aliados, scores enemigos): poke enemigo alto, 2+ flankers, sin sinergias...
+GOLDEN = [
+    (["Reinhardt", "Tracer", "Genji", "Ana", "Lucio"], ["Sigma", "Widowmaker", "Hanzo", "Zenyatta", "Baptiste"],
+     [32.0, 39.5, 12.5, 11.5, 9.5], [4.5, 0.0, 0.5, -7.5, 2.5]),
+    (["Sigma", "Widowmaker", "Hanzo", "Zenyatta", "Baptiste"], ["Winston", "Tracer", "Genji", "Ana", "Kiriko"],
+     [12.5, -1.5, -4.0, -6.0, 4.0], [29.5, 44.5, 16.5, 10.5, 5.5]),
+    (["Zarya", "Soldier: 76", "Junkrat", "Brigitte", "Mercy"], ["D.Va", "Tracer", "Reaper", "Lucio", "Moira"],
+     [7.5, 0.0, 4.0, 8.5, -5.5], [-8.0, 3.5, 9.0, -1, 4]),
+    (["Orisa", "Bastion", "Mei", "Juno", "Illari"], ["Ramattra", "Ashe", "Pharah", "Mercy", "Kiriko"],
+     [4, 0.5, -8.5, -1, 7.5], [-12.0, 7.0, 9.5, 10, 1.5]),
+]
+
+
+def lineup_scores(analyzer, allies, enemies):
+    return ([analyzer.calculate_score(h, allies, enemies) for h in allies],
+            [analyzer.calculate_score(h, enemies, allies) for h in enemies])
+
+
+def test_shipped_rules_load_without_errors():
+    loaded, problems = rules.load_rules(RULES_PATH)
+    assert problems == []
+    assert loaded == rules.DEFAULT_RULES
+
+
+@pytest.mark.parametrize("allies, enemies, ally_scores, enemy_scores", GOLDEN)
+def test_golden_scores(allies, enemies, ally_scores, enemy_scores):
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=RULES_PATH)
+    assert analyzer.load_errors == []
+    assert lineup_scores(analyzer, allies, enemies) == (ally_scores, enemy_scores)
+
+
+@pytest.mark.parametrize("content", [None, "{not json", json.dumps({"matchup_scale": "x"})])
+def test_missing_or_invalid_rules_keep_original_scores(tmp_path, content):
+    path = tmp_path / "rules.json"
+    if content is not None: path.write_text(content, encoding='utf-8')
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=str(path))
+    # Las reglas integradas son utilizables: aviso, no error de carga
+    assert analyzer.rules_warnings and all(str(path) in warning for warning in analyzer.rules_warnings)
+    assert analyzer.load_errors == [] and analyzer.validate() == []
+    assert analyzer.rules == rules.DEFAULT_RULES
+    allies, enemies, ally_scores, enemy_scores = GOLDEN[0]
+    assert lineup_scores(analyzer, allies, enemies) == (ally_scores, enemy_scores)
+
+
+def test_reload_without_rules_file_is_accepted(tmp_path):
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=str(tmp_path / "rules.json"))
+    for data_changed, bans_changed in ((True, True), (False, True)):
+        new = analyzer.reloaded(data_changed, bans_changed)
+        assert new.rules_warnings and new.validate() == []
+
+
+def test_cli_runs_without_rules_file(tmp_path):
+    # Las herramientas de línea de comandos arrancan con las reglas integradas
+    for name in ("data.json", "bans.json"): shutil.copy(os.path.join(HERE, name), tmp_path / name)
+    result = subprocess.run([sys.executable, os.path.join(HERE, "draft.py"), "--budget", "20"],
+                            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "reglas integradas" in result.stdout
+
+
+def test_changed_rules_change_scores(tmp_path):
+    # La regresión debe detectar un cambio de pesos
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(dict(rules.DEFAULT_RULES, matchup_scale=1.0)), encoding='utf-8')
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=str(path))
+    assert analyzer.load_errors == []
+    allies, enemies, ally_scores, enemy_scores = GOLDEN[0]
+    assert lineup_scores(analyzer, allies, enemies) != (ally_scores, enemy_scores)
+
+
+def test_generated_scorers_match_interpreted_rules():
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=RULES_PATH)
+    assert rules.check_equivalence(analyzer, rules.random_queries(analyzer, 5000)) == []
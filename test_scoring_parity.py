@@ -0,0 +1,265 @@
+# test_scoring_parity.py
+# Paridad de Analyzer con la implementación original basada en dicts (BaselineAnalyzer, copia
+# congelada del código anterior a las tablas compiladas). Cubre cada pareja (héroe, enemigo) y
+# (héroe, aliado) y alineaciones aleatorias: scores, recomendaciones, argumentos y análisis.
+# Uso: python -m pytest -q
+import json
+import os
+import random
+
+import pytest
+
+import locales
+from main import Analyzer, SLOT_ROLES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(HERE, "data.json")
+BANS_PATH = os.path.join(HERE, "bans.json")
+RULES_PATH = os.path.join(HERE, "rules.json")
+RANDOM_LINEUPS = 2000
+
+
+class BaselineAnalyzer:
+    # Referencia: métodos de Analyzer tal como estaban antes de compilar los datos (no modificar)
+    def __init__(self, data):
+        self.data = data
+
+    def get_comp_stats(self, heroes_list):
+        stats = {'total_poke': 0, 'sub_roles': {}}
+        active_heroes = [h for h in heroes_list if h and h in self.data]
+
+        for h in active_heroes:
+            info = self.data[h]
+            stats['total_poke'] += info.get('damage_profile', {}).get('poke', 1)
+            s_role = info.get('sub_role', 'General')
+            stats['sub_roles'][s_role] = stats['sub_roles'].get(s_role, 0) + 1
+
+        return stats
+
+    def calculate_score(self, hero_name, allies, enemies):
+        if not hero_name or hero_name not in self.data: return 0
+
+        hero_stats = self.data[hero_name]
+        score = 0
+
+        my_sub_role = hero_stats.get('sub_role', 'General')
+        my_poke = hero_stats.get('damage_profile', {}).get('poke', 1)
+        my_role = hero_stats.get('role', 'Damage')
+
+        enemy_stats = self.get_comp_stats(enemies)
+        enemy_poke = enemy_stats['total_poke']
+        enemy_flankers = enemy_stats['sub_roles'].get('Flanker', 0)
+
+        active_enemies = [e for e in enemies if e]
+        active_allies = [a for a in allies if a and a != hero_name]
+
+        counters = hero_stats.get('counters', {})
+        countered_by = hero_stats.get('countered_by', {})
+        synergies = hero_stats.get('synergies', {})
+
+        for enemy in active_enemies:
+            if enemy in counters: score += counters[enemy].get('score', 0) * 1.5
+            if enemy in countered_by: score -= countered_by[enemy].get('score', 0) * 1.5
+
+        has_synergy = False
+        for ally in active_allies:
+            if ally in synergies:
+                score += synergies[ally].get('score', 0)
+                has_synergy = True
+
+        if enemy_poke >= 12:
+            if my_sub_role == "Stalwart": score += 2.0
+            elif my_poke >= 4: score += 1.5
+            elif my_role == "Damage" and my_poke < 2 and my_sub_role != "Flanker": score -= 1.5
+
+        if enemy_flankers >= 2:
+            if my_role == "Support":
+                if my_sub_role in ["Survivor", "Tactician"]: score += 2.0
+                elif my_sub_role == "Medic" and hero_stats.get('survivability', 0) < 3: score -= 2.0
+
+            if hero_stats.get('weakness_profile', {}).get('cc_susceptibility', 0) < 3:
+                if my_sub_role in ["Specialist", "Bruiser"]: score += 1.0
+
+        if my_sub_role in ["Sharpshooter", "Stalwart"]: score += 0.5
+
+        if hero_stats.get('team_dependency', 3) >= 4 and not has_synergy:
+            score -= 1
+
+        return round(score, 1)
+
+    def get_recommendations(self, current_allies, enemies, bans, forced_idx=None):
+        scores = []
+        for i, name in enumerate(current_allies):
+            val = self.calculate_score(name, current_allies, enemies) if name and name in self.data else -999
+            scores.append((i, val))
+
+        target_idx = forced_idx if forced_idx is not None else min(scores, key=lambda x: x[1])[0]
+
+        if target_idx >= len(current_allies): return None, [], scores
+
+        target_hero = current_allies[target_idx]
+
+        if target_hero and target_hero in self.data:
+            target_role = self.data[target_hero]['role']
+        else:
+            target_role = "Tank" if target_idx == 0 else ("Damage" if target_idx in [1, 2] else "Support")
+
+        candidates = []
+        other_allies = [h for i, h in enumerate(current_allies) if i != target_idx and h]
+
+        for name, info in self.data.items():
+            if (info['role'] == target_role and
+                name != target_hero and
+                name not in other_allies and
+                name not in bans):
+
+                temp_allies = current_allies[:]
+                temp_allies[target_idx] = name
+                candidates.append((name, self.calculate_score(name, temp_allies, enemies)))
+
+        candidates.sort(key=lambda x: x[1], reverse=True)
+        return target_hero, candidates[:3], scores
+
+    def get_tip(self, hero_name, lang='es'):
+        if hero_name not in self.data: return locales.get_text(lang, 'no_tips')
+        hero_data = self.data[hero_name]
+        raw_tips = hero_data.get('tips', None)
+
+        if isinstance(raw_tips, dict):
+            return raw_tips.get(lang, raw_tips.get('es', locales.get_text(lang, 'no_tips')))
+        if isinstance(raw_tips, str):
+            return raw_tips
+        if lang in hero_data:
+            return hero_data[lang]
+        if 'es' in hero_data:
+            return hero_data['es']
+        return locales.get_text(lang, 'no_tips')
+
+    def generate_argument(self, hero_name, enemies, allies, lang='es'):
+        info = self.data[hero_name]
+        argumentos = []
+
+        sub_role = info.get('sub_role', 'General')
+        poke_val = info.get('damage_profile', {}).get('poke', 0)
+        enemy_stats = self.get_comp_stats(enemies)
+
+        if enemy_stats['total_poke'] >= 12 and (poke_val >= 4 or sub_role == "Stalwart"):
+             msg = locales.get_text(lang, 'arg_poke_res').format(sub_role=sub_role)
+             argumentos.append(msg)
+
+        if enemy_stats['sub_roles'].get('Flanker', 0) >= 2 and sub_role in ["Survivor", "Bruiser"]:
+             msg = locales.get_text(lang, 'arg_anti_dive').format(sub_role=sub_role)
+             argumentos.append(msg)
+
+        active_enemies = [e for e in enemies if e]
+        counters = info.get('counters', {})
+
+        for enemy in active_enemies:
+            if enemy in counters:
+                reason = counters[enemy].get('type', 'counter').replace('_', ' ')
+                msg = locales.get_text(lang, 'arg_counter').format(enemy=enemy, reason=reason)
+                argumentos.append(msg)
+
+        if argumentos:
+            return "\n".join(argumentos)
+        else:
+            return locales.get_text(lang, 'arg_solid').format(sub_role=sub_role)
+
+    def get_hero_analysis(self, hero_name, allies, enemies, lang='es'):
+        if not hero_name or hero_name not in self.data: return None
+        info = self.data[hero_name]
+
+        current_tip = self.get_tip(hero_name, lang)
+
+        analysis = {
+            "pros": [], "cons": [], "synergies": [],
+            "tips": current_tip,
+            "archetype": info.get('archetype', []),
+            "sub_role": info.get('sub_role', "General"),
+            "health": info.get('health', "???"),
+            "poke": info.get('damage_profile', {}).get('poke', 0)
+        }
+
+        active_enemies = [e for e in enemies if e]
+        active_allies = [a for a in allies if a and a != hero_name]
+
+        for enemy in active_enemies:
+            if enemy in info.get('counters', {}):
+                analysis["pros"].append(locales.get_text(lang, 'pro_txt').format(enemy))
+            if enemy in info.get('countered_by', {}):
+                analysis["cons"].append(locales.get_text(lang, 'con_txt').format(enemy))
+
+        for ally in active_allies:
+            if ally in info.get('synergies', {}):
+                analysis["synergies"].append(locales.get_text(lang, 'syn_txt').format(ally))
+
+        return analysis
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    an = Analyzer(DATA_PATH, BANS_PATH, rules_path=RULES_PATH)
+    assert an.load_errors == []
+    return an
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    with open(DATA_PATH, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    return BaselineAnalyzer(content.get('heroes', content))
+
+
+def random_lineups(baseline, count=RANDOM_LINEUPS, seed=0):
+    # (aliados, enemigos, baneos) por rol de hueco, con huecos vacíos y héroes repetidos entre equipos
+    rnd = random.Random(seed)
+    by_role = {}
+    for name, info in baseline.data.items(): by_role.setdefault(info['role'], []).append(name)
+    names = list(baseline.data)
+    for _ in range(count):
+        teams = []
+        for _ in range(2):
+            team = [rnd.choice(by_role[role]) if rnd.random() < 0.8 else "" for role in SLOT_ROLES]
+            teams.append(team)
+        yield teams[0], teams[1], rnd.sample(names, rnd.randint(0, 4))
+
+
+def test_every_hero_enemy_pairing(analyzer, baseline):
+    for hero in baseline.data:
+        for enemy in baseline.data:
+            assert analyzer.calculate_score(hero, [hero], [enemy]) == baseline.calculate_score(hero, [hero], [enemy]), \
+                (hero, enemy)
+
+
+def test_every_hero_ally_pairing(analyzer, baseline):
+    for hero in baseline.data:
+        for ally in baseline.data:
+            allies = [hero, ally]
+            assert analyzer.calculate_score(hero, allies, []) == baseline.calculate_score(hero, allies, []), \
+                (hero, ally)
+
+
+def test_random_lineup_scores(analyzer, baseline):
+    for allies, enemies, _ in random_lineups(baseline):
+        for hero in allies + enemies:
+            expected = baseline.calculate_score(hero, allies, enemies)
+            assert analyzer.calculate_score(hero, allies, enemies) == expected, (hero, allies, enemies)
+
+
+def test_random_lineup_recommendations(analyzer, baseline):
+    for i, (allies, enemies, bans) in enumerate(random_lineups(baseline, RANDOM_LINEUPS // 4)):
+        forced = i % len(SLOT_ROLES) if i % 2 else None
+        assert analyzer.get_recommendations(allies[:], enemies, bans, forced) == \
+            baseline.get_recommendations(allies[:], enemies, bans, forced), (allies, enemies, bans, forced)
+
+
+def test_random_lineup_arguments_and_analysis(analyzer, baseline):
+    for i, (allies, enemies, _) in enumerate(random_lineups(baseline, RANDOM_LINEUPS // 4)):
+        lang = ('es', 'en')[i % 2]
+        for hero in filter(None, allies):
+            assert analyzer.generate_argument(hero, enemies, allies, lang) == \
+                baseline.generate_argument(hero, enemies, allies, lang), (hero, allies, enemies)
+            # El análisis actual añade claves (best_counter, top_threat); las originales no cambian
+            expected = baseline.get_hero_analysis(hero, allies, enemies, lang)
+            analysis = analyzer.get_hero_analysis(hero, allies, enemies, lang)
+            assert {key: analysis[key] for key in expected} == expected, (hero, allies, enemies)
@@ -0,0 +1,89 @@
+# test_server.py
+# Validación de entradas del servidor HTTP: cada parámetro inválido responde 400 (o un error
+# en su propia entrada de /batch) en lugar de bloquear un hilo o devolver un 500.
+# Uso: python -m pytest -q
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from main import Analyzer
+from server import PooledHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(HERE, "data.json")
+BANS_PATH = os.path.join(HERE, "bans.json")
+RULES_PATH = os.path.join(HERE, "rules.json")
+
+
+@pytest.fixture(scope="module")
+def server():
+    analyzer = Analyzer(DATA_PATH, BANS_PATH, rules_path=RULES_PATH)
+    assert analyzer.load_errors == []
+    srv = PooledHTTPServer(("127.0.0.1", 0), analyzer, workers=2)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(server, path, body):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        conn.request("POST", path, body if isinstance(body, str) else json.dumps(body),
+                     {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("budget", ["NaN", "Infinity", "-Infinity", "0", "-5", '"abc"'])
+def test_draft_rejects_invalid_budget(server, budget):
+    status, payload = post(server, "/draft", '{"allies": [], "enemies": [], "bans": [], "budget_ms": %s}' % budget)
+    assert status == 400, payload
+    assert "error" in payload
+
+
+def test_draft_clamps_large_budget(server):
+    status, payload = post(server, "/draft", {"allies": ["Reinhardt", "Tracer", "Genji", "Ana"],
+                                              "enemies": ["Sigma", "Widowmaker", "Hanzo", "Zenyatta", "Baptiste"],
+                                              "bans": ["Mercy", "Lucio", "Kiriko", "Moira"], "budget_ms": 1e12})
+    assert status == 200, payload
+    assert payload["action"] == {"kind": "pick", "side": "allies", "hero": payload["pv"][0]["hero"]}
+
+
+@pytest.mark.parametrize("rows", [[[0, 1, "Ana", -1, -1]], [[0, 1, 2, 3, 999]], [[0, -2, 1, 2, 3]], [[0, 1.5]],
+                                  [[True, 1]], ["Ana"], [[0, None]]])
+def test_score_batch_rejects_bad_rows(server, rows):
+    status, payload = post(server, "/score_batch", {"allies": rows, "enemies": [[-1] * 5]})
+    assert status == 400, payload
+    assert "fila 0" in payload["error"]
+
+
+def test_score_batch_accepts_names_and_ids(server):
+    names = ["Reinhardt", "Tracer", "", "Ana", "Lucio"]
+    ids = [server.analyzer.hero_ids.get(h, -1) for h in names]
+    status, payload = post(server, "/score_batch", {"allies": [names, ids], "enemies": [[-1] * 5, [""] * 5]})
+    assert status == 200, payload
+    assert payload["allies"][0] == payload["allies"][1]
+
+
+@pytest.mark.parametrize("k", [0, -1, 10 ** 6, "x"])
+def test_swaps_rejects_out_of_range_k(server, k):
+    status, payload = post(server, "/swaps", {"allies": ["Reinhardt", "Tracer", "Genji", "Ana", "Lucio"],
+                                              "enemies": [], "k": k})
+    assert status == 400, payload
+
+
+def test_batch_reports_bad_entries_in_place(server):
+    status, payload = post(server, "/batch", {"requests": [
+        "score", None, {"method": "nope"}, {"method": "score", "params": {"hero": "Ana", "allies": ["Ana"]}}]})
+    assert status == 200, payload
+    results = payload["results"]
+    assert len(results) == 4
+    assert all("error" in r for r in results[:3])
+    assert "score" in results[3]
@@ -0,0 +1,34 @@
+# test_startup.py
+# Presupuesto de arranque: main.py --startup-report en un proceso nuevo debe llegar a
+# "interactive" por debajo de bench.STARTUP_BUDGET_MS (mediana de varias ejecuciones).
+# Necesita una pantalla para Tk; sin ella se omite.
+# Uso: python -m pytest -q
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+from bench import STARTUP_BUDGET_MS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RUNS = 3
+
+pytest.importorskip("tkinter")
+pytestmark = pytest.mark.skipif(sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or
+                                                                          os.environ.get("WAYLAND_DISPLAY")),
+                                reason="sin pantalla para Tk")
+
+
+def startup_marks():
+    proc = subprocess.run([sys.executable, os.path.join(HERE, "main.py"), "--startup-report"], cwd=HERE,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_time_to_interactive_within_budget():
+    interactive = statistics.median(startup_marks()["interactive"] for _ in range(RUNS))
+    assert interactive <= STARTUP_BUDGET_MS, f"time-to-interactive {interactive:.0f} ms > {STARTUP_BUDGET_MS} ms"